@@ -0,0 +1,147 @@
+"""
+Anytime scheduling algorithm for the single processor, indepedent tasks model.
+
+The other algorithms run to completion no matter how long they take, while the
+scheduler itself only has a fixed amount of time per scheduling round. This algorithm
+wraps them so that solve time is bounded by a wall-clock budget:
+    - a valid schedule is available immediately: the all-zeros schedule of
+      references/SAMPLE_ALGORITHM.py (only the mandatory parts), then NewGreedy,
+    - it is refined with the dynamic programming algorithm at progressively finer delta,
+      skipping any delta whose predicted runtime would not fit in the budget left (the
+      prediction comes from costmodel.py, corrected by the runs made so far), and
+    - any time still left is given to the exact branch and bound search.
+The best valid schedule found so far and its metric are kept in best_sched and
+best_metric, so they can also be read while sched is still running.
+"""
+
+import numpy as np
+import math
+import time as systime
+
+from newgreedy import NewGreedy
+from dynamic import Dynamic
+from branchandbound import BranchAndBound
+from metrics import validate_sched, weighted_avg_metric, VALID
+from costmodel import get_cost_model
+from problems import Problem
+
+POS_INF = 10**10
+
+class Anytime():
+    # The maintained list of optimal depths.
+    # That is, depth_sched[i] is the number of stages to be run for task i in the selected schedule.
+    # i.e. this is where the solution for the current optimal schedule gets stored
+    depth_sched = []
+
+    def __init__(self, budget=1.0, deltas=(.1, .05, .01, .005, .001), exact=True, cost_model=None):
+        """
+        budget      wall-clock seconds that sched may spend refining the schedule
+        deltas      deltas for the dynamic programming refinements, coarsest first
+        exact       whether to finish with the branch and bound search if time is left
+        cost_model  the costmodel.CostModel predicting the dynamic programming runtimes
+                    (by default the one persisted on this machine, or the default costs)
+        """
+        if budget < 0:
+            raise ValueError("budget should be non-negative")
+        if any(delta <= 0 for delta in deltas):
+            raise ValueError("deltas should be positive")
+        self.depth_sched = []
+        self.budget = budget
+        self.deltas = sorted(deltas, reverse=True)
+        self.exact = exact
+        self.cost_model = cost_model if cost_model is not None else get_cost_model(calibrate=False)
+        self.best_sched = None      # best valid schedule found so far
+        self.best_metric = -1       # its weighted_avg_metric
+        self.best_alg = None        # name of the step that found it
+        self.optimal = False        # whether best_sched is known to be optimal
+        self.history = []           # (seconds since start, step name, metric) per improvement
+        self.cost_scale = 1.0       # measured / predicted runtime of the last dynamic programming run
+
+    def sched(self, num_tasks, stages, time, prec, prio, dead, verbose=False):
+        """
+        Schedules the passed tasks with associated metadata
+
+        num_tasks   number of tasks
+        stages      stages[i] is number of stages for task i
+        time        time[i][l] is the expected runtime for the first l stages of task i (cumulative)
+        prec        prec[i][l] is the expected precision achieved by running the first l stages of task i
+        prio        prio[i] is the priority for task i
+        dead        dead[i] is the deadline for task i
+
+        """
+        return self.sched_problem(Problem(num_tasks, stages, time, prec, prio, dead), verbose)
+
+    def sched_problem(self, problem, verbose=False):
+        """
+        Schedules the tasks of problem (a problems.Problem), as sched does. The same problem is
+        passed on to the algorithms this one runs.
+        """
+
+        # Check for correct inputs
+        problem.check()
+        num_tasks, stages, time, prec, prio, dead = problem.args
+
+        start = systime.time()
+        self.best_sched = None
+        self.best_metric = -1
+        self.best_alg = None
+        self.optimal = False
+        self.history = []
+        args = problem.args
+
+        def remaining():
+            return self.budget - (systime.time() - start)
+
+        def offer(depth_sched, name):
+            # Keep depth_sched if it is valid and better than the best so far
+            reason, task_idx = validate_sched(depth_sched, *args)
+            if reason != VALID:
+                return
+            metric = weighted_avg_metric(depth_sched, *args)
+            if self.best_sched is None or metric > self.best_metric:
+                self.best_sched = list(depth_sched)
+                self.best_metric = metric
+                self.best_alg = name
+                self.history.append((systime.time() - start, name, metric))
+                if verbose:
+                    print("{:.4f}s {}: {}".format(systime.time() - start, name, metric))
+
+        if num_tasks == 0:
+            self.optimal = True
+            self.best_sched = []
+            self.depth_sched = []
+            return self.depth_sched
+
+        # 1. The all-zeros schedule (mandatory parts only). If even this is
+        # invalid, no valid schedule exists.
+        offer([0] * num_tasks, 'zeros')
+        if self.best_sched is None:
+            self.depth_sched = None
+            return None
+
+        # 2. The greedy schedule
+        offer(NewGreedy().sched_problem(problem), 'NewGreedy')
+
+        # 3. Dynamic programming at progressively finer delta, skipping any delta
+        # whose predicted runtime does not fit in the time left.
+        max_reward = max(prec[i][-1] * prio[i] for i in range(num_tasks)) if num_tasks > 0 else 0
+        for delta in self.deltas:
+            if remaining() <= 0:
+                break
+            predicted = self.cost_scale * self.cost_model.predict(num_tasks, max(stages, default=0), max_reward, delta)
+            if predicted > remaining():
+                continue
+            step_start = systime.time()
+            offer(Dynamic(delta).sched_problem(problem), 'Dynamic({})'.format(delta))
+            # Correct later predictions by how far off this one was (the cost constants depend on the machine)
+            if predicted > 0:
+                self.cost_scale *= (systime.time() - step_start) / predicted
+
+        # 4. The exact search with whatever time is left
+        if self.exact and remaining() > 0:
+            bb = BranchAndBound(time_limit=remaining())
+            offer(bb.sched_problem(problem), 'BranchAndBound')
+            self.optimal = bb.optimal
+
+        self.depth_sched = self.best_sched
+        return self.depth_sched
@@ -0,0 +1,192 @@
+"""
+Exact branch and bound algorithm for the single processor, indepedent tasks model.
+Tasks may have different deadlines: they run in the order given, and every task has to
+finish by its own deadline (see slacktree.py).
+
+With a common deadline, choosing a depth for every task is a multiple-choice knapsack problem,
+with value prio[i] * prec[i][l] for running task i to depth l (different deadlines add a knapsack
+constraint for every task, on the time of it and the tasks before it). This algorithm
+solves it exactly, with no quantization of the reward (unlike the dynamic programming
+algorithms, whose quality depends on delta):
+    - the incumbent (best schedule so far) starts as the best valid one of the NewGreedy and HullGreedy
+      schedules and the mandatory parts alone,
+    - tasks are given depths one at a time in a depth-first search, and
+    - a subtree is pruned when its upper bound, the LP relaxation of the remaining tasks, cannot beat
+      the incumbent. The LP relaxation is the fractional greedy fill of the slack of the last task across the
+      upper concave hull segments of the remaining tasks (see hullgreedy.py).
+A node or time budget can be given, in which case the best schedule found within it is returned.
+"""
+
+import time as systime
+import numpy as np
+import math
+from hullgreedy import HullGreedy
+from newgreedy import NewGreedy
+from metrics import is_valid_sched
+from problems import Problem
+
+POS_INF = 10**10 
+
+class BranchAndBound():
+    # The maintained list of optimal depths. 
+    # That is, depth_sched[i] is the number of stages to be run for task i in the selected schedule.
+    # i.e. this is where the solution for the current optimal schedule gets stored
+    depth_sched = []
+
+    def __init__(self, max_nodes=None, time_limit=None):
+        """
+        max_nodes   stop searching after this many search tree nodes (no limit by default)
+        time_limit  stop searching after this many seconds (no limit by default)
+
+        When the search stops early the best schedule found so far is returned
+        and optimal is False after sched returns.
+        """
+        self.depth_sched = []
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        # Whether the last schedule returned is known to be optimal, and the number of nodes searched for it
+        self.optimal = False
+        self.nodes = 0
+
+    def sched(self, num_tasks, stages, time, prec, prio, dead, verbose=False):
+        """
+        Schedules the passed tasks with associated metadata
+
+        num_tasks   number of tasks
+        stages      stages[i] is number of stages for task i
+        time        time[i][l] is the expected runtime for the first l stages of task i (cumulative)
+        prec        prec[i][l] is the expected precision achieved by running the first l stages of task i
+        prio        prio[i] is the priority for task i
+        dead        dead[i] is the deadline for task i
+
+        """
+        return self.sched_problem(Problem(num_tasks, stages, time, prec, prio, dead), verbose)
+
+    def sched_problem(self, problem, verbose=False):
+        """
+        Schedules the tasks of problem (a problems.Problem), as sched does.
+        Uses the upper hulls and slack tree of problem, and passes it on to the incumbent greedy algorithms.
+        """
+
+        # Check for correct inputs
+        problem.check()
+        num_tasks, stages, time, prec, prio, dead = problem.args
+
+        self.nodes = 0
+        self.optimal = False
+        start = systime.time()
+
+        if num_tasks == 0:
+            self.optimal = True
+            self.depth_sched = []
+            return self.depth_sched
+
+        # check that the mandatory parts of tasks meet every deadline
+        slack = problem.slack_tree()
+        if slack is None:
+            return None
+
+        # value[i][l] is the reward for running task i to depth l
+        value = [[prio[i] * prec[i][l] for l in range(stages[i])] for i in range(num_tasks)]
+
+        # Tasks are given depths in order of how much reward they could add, most first
+        order = sorted(range(num_tasks), key=lambda i: -(max(value[i]) - value[i][0]))
+        position = [0] * num_tasks
+        for k, i in enumerate(order):
+            position[i] = k
+
+        # All hull segments of all tasks, sorted by added reward per added time (best first)
+        seg_slope = []
+        seg_time = []
+        seg_value = []
+        seg_pos = []
+        for i in range(num_tasks):
+            hull = problem.hulls[i]
+            for k in range(1, len(hull)):
+                added_time = time[i][hull[k]] - time[i][hull[k-1]]
+                added_value = value[i][hull[k]] - value[i][hull[k-1]]
+                seg_slope.append(added_value / added_time if added_time > 0 else POS_INF)
+                seg_time.append(added_time)
+                seg_value.append(added_value)
+                seg_pos.append(position[i])
+        seg_order = np.argsort(-np.array(seg_slope), kind='stable')
+        seg_time = np.array(seg_time)[seg_order]
+        seg_value = np.array(seg_value)[seg_order]
+        seg_pos = np.array(seg_pos, dtype=int)[seg_order]
+
+        # The LP relaxation for the tasks at positions k onwards only needs their segments, so for each
+        # k the running totals of time and reward along those segments are computed once, when first needed
+        suffix_segments = {}
+        def lp_bound(k, rem):
+            """
+            Upper bound on the reward the tasks at positions k onwards can add over their
+            mandatory parts in rem spare time (the LP relaxation, filled greedily along hull segments).
+            """
+            if k not in suffix_segments:
+                keep = seg_pos >= k
+                suffix_segments[k] = (np.cumsum(seg_time[keep]), np.cumsum(seg_value[keep]), seg_time[keep], seg_value[keep])
+            cum_time, cum_value, added_time, added_value = suffix_segments[k]
+            # the number of whole segments that fit, then a fraction of the next one
+            j = int(np.searchsorted(cum_time, rem, side='right'))
+            bound = cum_value[j-1] if j > 0 else 0
+            if j < len(added_time):
+                bound += added_value[j] * (rem - (cum_time[j-1] if j > 0 else 0)) / added_time[j]
+            return bound
+
+        # Start from the best of the NewGreedy and HullGreedy schedules (HullGreedy only checks the
+        # first deadline, so its schedule may be invalid) and the mandatory parts alone, which are valid
+        best_sched = [0] * num_tasks
+        best_value = sum(value[i][0] for i in range(num_tasks))
+        for alg in (NewGreedy(), HullGreedy()):
+            alg_sched = alg.sched_problem(problem)
+            if not is_valid_sched(alg_sched, *problem.args):
+                continue
+            alg_value = sum(value[i][alg_sched[i]] for i in range(num_tasks))
+            if alg_value > best_value:
+                best_sched, best_value = alg_sched, alg_value
+
+        # Depth-first search over depths for the tasks in order. A node is
+        # (k, depths chosen for order[:k], reward of those tasks over their mandatory parts, slack left)
+        # Rewards are measured over the mandatory parts so the bound only concerns what is left to add.
+        # The bound relaxes the deadlines to the last task's alone, which caps the total time added.
+        base_value = sum(value[i][0] for i in range(num_tasks))
+        stack = [(0, [], 0, slack)]
+        eps = 1e-12
+        while stack:
+            if self.max_nodes is not None and self.nodes >= self.max_nodes:
+                break
+            if self.time_limit is not None and systime.time() - start >= self.time_limit:
+                break
+            k, depths, added, slack = stack.pop()
+            self.nodes += 1
+            if k == num_tasks:
+                if base_value + added > best_value + eps:
+                    best_value = base_value + added
+                    best_sched = [0] * num_tasks
+                    for pos, l in enumerate(depths):
+                        best_sched[order[pos]] = l
+                continue
+            # Children: every depth of the next task that fits, with its bound
+            i = order[k]
+            children = []
+            for l in range(stages[i]):
+                added_time = time[i][l] - time[i][0]
+                if not slack.fits(i, added_time):
+                    continue
+                child_added = added + value[i][l] - value[i][0]
+                bound = base_value + child_added + lp_bound(k + 1, slack.last_slack() - added_time)
+                if bound > best_value + eps:
+                    children.append((bound, l, child_added, added_time))
+            # Push the most promising child last so that it is searched first
+            children.sort(key=lambda child: child[:2])
+            for bound, l, child_added, added_time in children:
+                child_slack = slack.copy()
+                child_slack.add_time(i, added_time)
+                stack.append((k + 1, depths + [l], child_added, child_slack))
+        else:
+            # The search finished, so the incumbent is optimal
+            self.optimal = True
+
+        # Return the depth schedule (EDF is used for the server to dispatch tasks)
+        self.depth_sched = best_sched
+        return best_sched
@@ -0,0 +1,165 @@
+"""
+Runtime cost model for the dynamic programming algorithm (dynamic.py), used to pick delta
+for a target solve latency (Dynamic(delta='auto')) and to budget the refinements of anytime.py.
+
+Dynamic computes one table row per task. With a largest single-task reward of Rmax, each row has
+about num_tasks * Rmax / delta columns, and each row takes one vectorized step per stage. So the
+runtime is modelled as
+    row_cost * num_tasks + cell_cost * num_tasks * cols * num_stages
+The two costs depend on the machine, so they are fitted by a small built-in benchmark
+(calibrate) and persisted to disk so that the benchmark only runs once per machine.
+"""
+
+import numpy as np
+import math
+import json
+import os
+import time as systime
+
+from problems import gen_problems, get_problem
+
+# Where the calibrated model is kept (the DYNAMIC_COST_MODEL environment variable overrides this)
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'dynamic_cost_model.json')
+
+# Costs measured for the vectorized rows on a development machine, used until calibrated
+ROW_COST = 5e-5
+CELL_COST = 3e-9
+
+# The benchmark problems: (num_tasks, delta) pairs, each timed CALIBRATION_REPEATS times
+CALIBRATION_RUNS = [(10, .1), (10, .01), (50, .1), (50, .02), (150, .1), (150, .02)]
+CALIBRATION_REPEATS = 3
+
+# The loaded (or calibrated) model, shared by all callers of get_cost_model
+_cost_model = None
+
+
+class CostModel():
+
+    def __init__(self, row_cost=ROW_COST, cell_cost=CELL_COST):
+        """
+        row_cost    seconds per table row (one per task)
+        cell_cost   seconds per (row, column, stage) table cell
+        """
+        self.row_cost = row_cost
+        self.cell_cost = cell_cost
+
+    def predict(self, num_tasks, num_stages, max_reward, delta):
+        """
+        Predicts the runtime in seconds of Dynamic(delta) on num_tasks tasks of at most num_stages
+        stages each, where max_reward is the largest reward of any single task.
+        """
+        if num_tasks == 0:
+            return 0
+        cols = num_tasks * math.ceil(max_reward / delta) + 1
+        cells = num_tasks * cols * num_stages
+        return self.row_cost * num_tasks + self.cell_cost * cells
+
+    def choose_delta(self, num_tasks, num_stages, max_reward, target_latency, min_delta=.001, max_delta=.2):
+        """
+        Returns the smallest delta in [min_delta, max_delta] whose predicted runtime is at most
+        target_latency (max_delta if even that one is predicted to be too slow).
+        """
+        if num_tasks == 0 or max_reward <= 0:
+            return min_delta
+        # Solve predict(delta) = target_latency for delta, ignoring the rounding of cols
+        budget = target_latency - self.row_cost * num_tasks - self.cell_cost * num_tasks * num_stages
+        if budget <= 0:
+            return max_delta
+        delta = self.cell_cost * num_tasks * num_tasks * num_stages * max_reward / budget
+        return min(max(delta, min_delta), max_delta)
+
+    def calibrate(self, verbose=False):
+        """
+        Fits row_cost and cell_cost (by least squares) to the runtimes of Dynamic on the
+        CALIBRATION_RUNS benchmark problems. Returns self.
+        """
+        from dynamic import Dynamic
+
+        # The benchmark problems are generated as the simulations generate theirs, but from their
+        # own generator so as not to disturb the global random state that the simulations rely on
+        gen = np.random.RandomState(0)
+        rows, seconds = [], []
+        for num_tasks, delta in CALIBRATION_RUNS:
+            L = 6
+            args = get_problem(0, *gen_problems([num_tasks], num_stages=L, gen=gen)[:5])
+            prec, prio = args[3], args[4]
+
+            elapsed = []
+            for _ in range(CALIBRATION_REPEATS):
+                start = systime.time()
+                Dynamic(delta).sched(*args)
+                elapsed.append(systime.time() - start)
+
+            max_reward = max(prec[i][-1] * prio[i] for i in range(num_tasks))
+            cols = num_tasks * math.ceil(max_reward / delta) + 1
+            rows.append([num_tasks, num_tasks * cols * L])
+            seconds.append(np.median(elapsed))
+            if verbose:
+                print("N={:4d} delta={:.3f}: {:.4f}s".format(num_tasks, delta, seconds[-1]))
+
+        coef = np.linalg.lstsq(np.array(rows, dtype=float), np.array(seconds), rcond=None)[0]
+        # A negative cost can come out of a noisy fit, so fall back to the default for it
+        self.row_cost = float(coef[0]) if coef[0] > 0 else ROW_COST
+        self.cell_cost = float(coef[1]) if coef[1] > 0 else CELL_COST
+        if verbose:
+            print("row_cost={:.3g}s cell_cost={:.3g}s".format(self.row_cost, self.cell_cost))
+        return self
+
+    def save(self, path):
+        """
+        Writes the model to path as json.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({'row_cost': self.row_cost, 'cell_cost': self.cell_cost}, f)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a model written by save. Raises OSError or ValueError if path does not hold one.
+        """
+        with open(path) as f:
+            data = json.load(f)
+        try:
+            return cls(float(data['row_cost']), float(data['cell_cost']))
+        except (KeyError, TypeError) as e:
+            raise ValueError("{} does not hold a cost model".format(path)) from e
+
+
+def get_cost_model(path=None, calibrate=True):
+    """
+    Returns the cost model persisted at path (DYNAMIC_COST_MODEL or DEFAULT_PATH by default).
+    If there is none, it is calibrated and saved there when calibrate is True, otherwise
+    the default costs are used.
+    """
+    global _cost_model
+    default_path = os.environ.get('DYNAMIC_COST_MODEL', DEFAULT_PATH)
+    if path is None:
+        if _cost_model is not None:
+            return _cost_model
+        path = default_path
+
+    try:
+        model = CostModel.load(path)
+    except (OSError, ValueError):
+        if not calibrate:
+            return CostModel()
+        model = CostModel().calibrate()
+        try:
+            model.save(path)
+        except OSError:
+            # The model still works for this process, it just is not persisted
+            pass
+
+    if path == default_path:
+        _cost_model = model
+    return model
+
+
+if __name__ == '__main__':
+    # Recalibrate and persist the model, e.g. after moving to a new machine
+    path = os.environ.get('DYNAMIC_COST_MODEL', DEFAULT_PATH)
+    CostModel().calibrate(verbose=True).save(path)
+    print("saved to", path)
@@ -5,7 +5,6 @@ scheduling algorithms implemented in this software respository can be used
 in the simulations run by these functions.
 """
 
-from metrics import weighted_avg_metric, max_priority_metric
 import numpy as np
 from numpy import random as rand
 import matplotlib.pyplot as plt
@@ -13,11 +12,12 @@ from tqdm import tqdm
 from yao import Yao
 from dynamic import Dynamic
 from greedy import Greedy 
-import random
-import time as systime
+from trials import run_trials
+from problems import gen_problems, get_problem
+from metrics import batch_metrics, count_failures, print_failure_summary
 
 
-def diffsimulate(num_trials, algs, prio_dist='uniform', num_tasks=(2,30)):
+def diffsimulate(num_trials, algs, prio_dist='uniform', num_tasks=(2,30), workers=1):
     """
     Generates num_trials 'random' scheduling problems and solves them using each of the algorithms
     in the list algs. 
@@ -25,11 +25,14 @@ def diffsimulate(num_trials, algs, prio_dist='uniform', num_tasks=(2,30)):
 
     Arguments:
         num_trials  - the number of trials (simulated scheduling problems) to generate and run
-        algs        - list of algorithm classes to be run on the simulated scheduling problems
+        algs        - list of (already instantiated) algorithm objects to be run on the simulated scheduling problems
         prio_dist   - the distribution from which the priority for each simulated task is drawn
                         as a string ('uniform' and 'beta' are current options but can easily add more)
         num_tasks   - num_tasks[0] is a lower bound and num_tasks[1] an upper bound on the number of tasks 
                         for each simulated scheduling problem (drawn uniformly)
+        workers     - number of worker processes to shard the trials across (1 runs them all in this process).
+                        The problems are all generated up front so the results are the same no matter
+                        how many workers are used
     """
     num_algs = len(algs)
     # NOTE number of metrics being used to evaluate the schedules (could be played with)
@@ -41,169 +44,45 @@ def diffsimulate(num_trials, algs, prio_dist='uniform', num_tasks=(2,30)):
         avg_results.append(([], []))
     elapsed = np.zeros(len(algs))
 
-    # Track the number of tasks in each generated trial (since it is selected at random)
+    # Track the number of tasks in each generated trial
     num_tasks_list = []
     task_num_range = num_tasks[1] - num_tasks[0] + 1
     trials_per_num_tasks = int(num_trials / task_num_range) + 1
-    cur_num_tasks = num_tasks[0]
-    count = 0
-    for cur_num_tasks in tqdm(range(num_tasks[0], num_tasks[1] + 1, 1)):
-        cur_results = []
-        for i in range(num_algs):
-            cur_results.append(([], [])) #a list for each of the two metrics(could be abstracted)
-        for i in range(trials_per_num_tasks):
-            count += 1
-            num_tasks_list.append(cur_num_tasks)
-
-            # stages[i] is the number of stages for task i 
-            # constant for now
-            num_stages = 6
-            stages = [num_stages] * cur_num_tasks
-
-            # time[i][l] is the runtime for the first l stages of task i (cumulative)
-            time = []
-            for task_idx, num_stages in enumerate(stages):
-                cur_times = []
-                for stage_idx in range(num_stages):
-                    # Sample times uniformly then sort
-                    sampled_time = rand.uniform(0, 1)
-                    cur_times.append(sampled_time)
-                cur_times = np.sort(np.array(cur_times))
-                time.append(cur_times)
-            """old method
-            time = []
-            for task_idx, num_stages in enumerate(stages):
-                cur_times = []
-                for stage_idx in range(num_stages):
-                    if stage_idx == 0:
-                        sampled_time = rand.uniform(0, 1)
-                    else:
-                        sampled_time = rand.uniform(cur_times[-1], 1)
-                    cur_times.append(sampled_time)
-                time.append(cur_times)
-            """
-               
-            # prec[i][l] is the expected prec for completing the first l stages of task i before the deadline
-            prec = []
-            for task_idx, num_stages in enumerate(stages):
-                cur_precs = []
-                for stage_idx in range(num_stages):
-                    # Sample precisions uniformly then sort
-                    sampled_prec = rand.uniform()
-                    cur_precs.append(sampled_prec)
-                cur_precs = np.sort(np.array(cur_precs))
-                prec.append(cur_precs)
-            """old method
-            prec = []
-            for task_idx, num_stages in enumerate(stages):
-                cur_precs = []
-                for stage_idx in range(num_stages):
-                    if stage_idx == 0:
-                        sampled_prec = rand.uniform()
-                    else:
-                        sampled_prec = rand.uniform(cur_precs[-1], 1)
-                    cur_precs.append(sampled_prec)
-                prec.append(cur_precs)
-            """
-
-            # dead[i] is the deadline for task i 
-            # (we assume we begin running at time 0, so D[i] is the maximum permissable runtime before task i must have been run)
-            # Note that these are weakly increasing as per requirement of the algorithm
-            # For now, let all the deadlines be half the total possible run time 
-            # to force some dropping of layers but some inclusion of others
-            total_mandatory_time = 0
-            for i in range(cur_num_tasks):
-                # assume we must run the *first* stage of each task
-                total_mandatory_time += time[i][0]
-            # also note that each task has maximum worst case run time at most 1 and so 
-            # we choose a deadline between the minimum necesary for valid scheduling and the maximum worst case run time
-            # note that since each task has at most 1 in runtime, cur_num_tasks*1 gives ~the total runtime of all tasks
-            deadline_per_task = total_mandatory_time + .5 * (cur_num_tasks - total_mandatory_time)
-            dead = [deadline_per_task] * cur_num_tasks
-
-            # the priority associated with each task drawn from passed distribution
-            prio = []
-            if prio_dist == 'uniform':
-                # Sample a uniform priority
-                for i in range(cur_num_tasks):
-                    cur_prio = rand.uniform()
-                    prio.append(cur_prio)
-            elif prio_dist == 'beta':
-                # Sample from a beta distribution (high at 0 and 1, lower in between)
-                a = .1
-                b = .1 # parameters that give desired shape
-                for i in range(cur_num_tasks):
-                    cur_prio = rand.beta(a, b)
-                    prio.append(cur_prio)
-            elif prio_dist == 'skew_right':
-                a = 2
-                b = 8 # parameters that give desired shape
-                for i in range(cur_num_tasks):
-                    cur_prio = rand.beta(a, b)
-                    prio.append(cur_prio)
-            elif prio_dist == 'skew_left':
-                a = 8
-                b = 2 # parameters that give desired shape
-                for i in range(cur_num_tasks):
-                    cur_prio = rand.beta(a, b)
-                    prio.append(cur_prio)
-            elif prio_dist == 'normal':
-                mean = .5
-                stddev = .16 # parameters that give desired shape
-                for i in range(cur_num_tasks):
-                    cur_prio = random.gauss(mean, stddev)
-                    while(cur_prio > 1 or cur_prio < 0):
-                        cur_prio = random.gauss(mean, stddev)                    
-                    prio.append(cur_prio)
-
-            verbose = False
-            if verbose:
-                # print the inputs
-                print("\nINPUTS:")
-                print(cur_num_tasks,"tasks with",stages,"stages")
-                print("\nWith expected runtimes:")
-                for i in range(len(time)):
-                    print(i,":",time[i])
-                print("\nWith expected precisions:")
-                for i in range(len(prec)):
-                    print(i,":",prec[i])
-                print("\nWith priorities:")
-                for i in range(len(prio)):
-                    print(i,":",prio[i])
-                print("\nWith deadlines:")
-                for i in range(len(dead)):
-                    print(i,":",dead[i])
-                print("\n\nSOLUTION:")
-
-            # get list of already instantiated objects for each of the algorithms
-            algorithms = []
-            for alg in algs:
-                algorithms.append(alg)
-
-            for i, alg in enumerate(algorithms):
-                # Call sched for these inputs (for this scheduling problem, run the algorithm)
-                start = systime.time()
-                depth_sched = alg.sched(cur_num_tasks, stages, time, prec, prio, dead, verbose=False)
-                elapsed[i] += systime.time() - start
-                #print(alg.__class__.__name__, depth_sched)
-
-                # Evaluate the resulting schedule for both the weighted average metric and the max priority metric
-                weightavg = weighted_avg_metric(depth_sched, cur_num_tasks, stages, time, prec, prio, dead)
-                maxprio = max_priority_metric(depth_sched, cur_num_tasks, stages, time, prec, prio, dead)
-                if weightavg == -1:
-                    print('Invalid schedule returned by '+alg.__class__.__name__)
+    for cur_num_tasks in range(num_tasks[0], num_tasks[1] + 1, 1):
+        num_tasks_list += [cur_num_tasks] * trials_per_num_tasks
+
+    # Generate all of the problems at once (from numpy's global generator, so seeding it still fixes the whole simulation)
+    stages, time, prec, prio, dead, mask = gen_problems(num_tasks_list, prio_dist)
+    problems = [get_problem(t, stages, time, prec, prio, dead) for t in range(len(num_tasks_list))]
+
+    # Run all the trials (in worker processes if requested); results come back in trial order
+    trial_results = run_trials(problems, algs, workers=workers,
+                                progress=lambda it, total: tqdm(it, total=total))
+    # depth_scheds[i][t] is the schedule the ith algorithm returned for trial t (padded),
+    # missing[i][t] is True if it returned no schedule at all
+    depth_scheds = np.full((num_algs,) + stages.shape, -1)
+    missing = np.zeros((num_algs, len(num_tasks_list)), dtype=bool)
+    for t, (trial_scheds, trial_elapsed) in enumerate(trial_results):
+        # elapsed is the total time spent in sched by each algorithm, summed over all trials (and workers)
+        elapsed += trial_elapsed
+        for i, depth_sched in enumerate(trial_scheds):
+            if depth_sched is None:
+                missing[i][t] = True
+            else:
+                depth_scheds[i][t][:len(depth_sched)] = depth_sched
+
+    # Evaluate all of the schedules for both the weighted average metric and the max priority metric at once
+    reasons, weightavgs, maxprios = batch_metrics(depth_scheds, stages, time, prec, prio, dead, missing)
+    for i in range(num_algs):
+        # record both metrics for this (ith) algorithm's schedules
+        results[i][0].extend(weightavgs[i].tolist())
+        results[i][1].extend(maxprios[i].tolist())
 
-                if verbose:
-                    print("\n\n Metrics for measuring algorithm performance: how good is this schedule?")
-                    print("weighted average metric: {}".format(weightavg))
-                    print("max priority task metric: {}".format(maxprio))
-                    print("")
+    # Summarize why any schedules were invalid, by algorithm
+    print_failure_summary(count_failures(reasons), [alg.__class__.__name__ for alg in algs])
 
-                # record both metrics for this (ith) algorithm's schedule
-                results[i][0].append(weightavg)
-                results[i][1].append(maxprio)
-                #cur_results[i][0].append(weightavg)
-                #cur_results[i][1].append(maxprio)
+    # Average the results over the trials with each number of tasks
+    for count in range(trials_per_num_tasks, len(num_tasks_list) + 1, trials_per_num_tasks):
         for alg_idx in range(len(algs)):
             for metric_idx in range(num_metrics):
                 avg = sum(results[alg_idx][metric_idx][count-trials_per_num_tasks:count]) / trials_per_num_tasks
@@ -15,8 +15,15 @@ the server need not use any of the other functions here.
 import numpy as np
 import math
 
+from costmodel import get_cost_model
+from kernels import HAVE_NUMBA, table_row
+from problems import Problem
+
 POS_INF = 10**10 
 
+# The range of deltas that delta='auto' chooses from
+AUTO_DELTA_RANGE = (.001, .2)
+
 class Dynamic:
     """
     The algorithm class maintains two tables S and P where:
@@ -26,6 +33,8 @@ class Dynamic:
         P[i][r] is the time (mentioned above) required to run the schedule implied by S[i][r].
                 The schedule implied by S[i][r] is the schedule obtained by running the tasks to 
                 the depths assigned by the solution S[i][r].
+    Both are numpy arrays: S is a small integer array holding -1 where reward r is not achievable
+    and P is a float64 array holding inf in those same cells.
     """
     
     # The S and P tables as described above.
@@ -37,15 +46,64 @@ class Dynamic:
     # i.e. this is where the solution for the current optimal schedule gets stored
     depth_sched = []
 
-    def __init__(self,delta=.01):
+    def __init__(self,delta=.01, index='reward', time_steps=1000, low_memory=False, pareto=False,
+                 target_latency=None, cost_model=None):
         """
         The algorithm class will populate the S and P solution tables once 
         tasks are passed (ie. sched is called).
+
+        delta       the basic increment of reward used for quantization of the reward space,
+                    or 'auto' to choose it on each call to sched as the smallest delta (within
+                    AUTO_DELTA_RANGE) predicted by the cost model to solve in target_latency seconds
+        index       'reward' (default) indexes the tables by quantized reward as described above.
+                    'time' instead indexes them by discretized time up to the latest deadline,
+                    in which case S[i][t] is the depth for task i that maximizes the quantized
+                    reward of the first i tasks run in exactly t time steps and Q[i][t] is that reward
+        time_steps  for index='time', the number of time steps the latest deadline is divided into
+        low_memory  if True, the S and P tables are never held in full: only rolling rows are kept
+                    and the depths are recovered by divide-and-conquer recomputation
+                    (see find_optimal_depths_low_memory), trading extra time for O(W log N) memory
+        pareto      if True, the dense tables are replaced by the Pareto frontier of (time, reward)
+                    states of each prefix of tasks (see compute_frontiers_from_scratch), which
+                    reaches the same optimal reward. This only pays off for a fine delta: at the
+                    delta of .01 the simulations use, the dense rows are faster
+        target_latency  for delta='auto', the target solve time in seconds
+        cost_model  for delta='auto', the costmodel.CostModel used to predict solve times
+                    (by default the one persisted on this machine, calibrated on first use)
         """
+        if index not in ('reward', 'time'):
+            raise ValueError("index should be 'reward' or 'time'")
+        if low_memory and index != 'reward':
+            raise ValueError("low_memory is only available with index='reward'")
+        if pareto and (low_memory or index != 'reward'):
+            raise ValueError("pareto is only available with index='reward' and without low_memory")
+        if delta == 'auto':
+            if target_latency is None or target_latency <= 0:
+                raise ValueError("delta='auto' needs a positive target_latency")
+            if index != 'reward':
+                raise ValueError("delta='auto' is only available with index='reward'")
+            if cost_model is None:
+                cost_model = get_cost_model()
         # Give some default values to other members
         self.S = None
         self.P = None
-        self.delta = delta
+        self.Q = None
+        self.T = None
+        self.S_buf = None
+        self.P_buf = None
+        # The tasks currently held in the tables (kept so that add_task/remove_task can update them)
+        self.tasks = {'stages': [], 'time': [], 'prec': [], 'prio': [], 'dead': [], 'R': []}
+        self.auto_delta = delta == 'auto'
+        self.delta = None if self.auto_delta else delta
+        self.target_latency = target_latency
+        self.cost_model = cost_model
+        # Worst-case shortfall of the returned schedule's reward from the optimum (see sched)
+        self.error_bound = None
+        self.index = index
+        self.time_steps = time_steps
+        self.low_memory = low_memory
+        self.pareto = pareto
+        self.F = []
 
     def sched(self, num_tasks, stages, time, prec, prio, dead, verbose=False):
         """
@@ -58,31 +116,31 @@ class Dynamic:
         prio        prio[i] is the priority for task i
         dead        dead[i] is the deadline for task i
 
+        """
+        return self.sched_problem(Problem(num_tasks, stages, time, prec, prio, dead), verbose)
+
+    def sched_problem(self, problem, verbose=False):
+        """
+        Schedules the tasks of problem (a problems.Problem), as sched does.
         """
 
         # Check for correct inputs
-        if not isinstance(num_tasks, int) or num_tasks < 0:
-            raise ValueError("num_tasks should be a positive integer")
-        if not len(stages) == num_tasks:
-            raise ValueError("stages should have length num_tasks")
-        if not len(time) == num_tasks:
-            raise ValueError("time should have length num_tasks")
-        for task_idx, time_list in enumerate(time):
-            if not len(time_list) == stages[task_idx]:
-                raise ValueError("time[i] should have length stages[i]")
-        for task_idx, prec_list in enumerate(prec):
-            if not len(prec_list) == stages[task_idx]:
-                raise ValueError("prec[i] should have length stages[i]")
-        if not len(prec) == num_tasks:
-            raise ValueError("prec should have length num_tasks")
-        if not len(prio) == num_tasks:
-            raise ValueError("prio should have length num_tasks")
-        if not len(dead) == num_tasks:
-            raise ValueError("dead should have length num_tasks")
+        problem.check()
+        num_tasks, stages, time, prec, prio, dead = problem.args
 
         # delta is the basic increment of reward
         # NOTE this is a good place to play and have fun!
+        if self.auto_delta:
+            # Choose the finest delta predicted to solve within the target latency
+            max_reward = max([self.reward(prec[i][-1], prio[i]) for i in range(num_tasks)], default=0)
+            self.delta = self.cost_model.choose_delta(num_tasks, max(stages, default=0), max_reward,
+                                                      self.target_latency, *AUTO_DELTA_RANGE)
         delta = self.delta
+        # Quantizing loses less than delta of each task's reward, so the schedule found is
+        # within num_tasks * delta of the optimal reward
+        self.error_bound = num_tasks * delta
+        if verbose:
+            print("delta:", delta, " error bound:", self.error_bound)
 
         # Compute the expected rewards for all stages of all tasks
         # R[i][l] is the reward for completing the first l stages of task i before the deadline
@@ -104,8 +162,21 @@ class Dynamic:
                     line += " "+str(r)
                 print(line)
 
-        # Find the solutions to all problems in tables S and P
-        if not self.compute_tables_from_scratch(num_tasks, stages, time, R, dead, delta):
+        # Remember the tasks held in the tables so that add_task/remove_task can update them later
+        self.tasks = {'stages': list(stages), 'time': list(time), 'prec': list(prec),
+                      'prio': list(prio), 'dead': list(dead), 'R': R}
+
+        # Find the solutions to all problems in tables S and P (or S and Q when indexed by time)
+        # (in low memory mode the tables are never built, see find_optimal_depths_low_memory)
+        if self.index == 'time':
+            if not self.compute_time_tables_from_scratch(num_tasks, stages, time, R, dead):
+                print('Error in compute_time_tables_from_scratch')
+                exit()
+        elif self.pareto:
+            if not self.compute_frontiers_from_scratch(num_tasks, stages, time, R, dead):
+                print('Error in compute_frontiers_from_scratch')
+                exit()
+        elif not self.low_memory and not self.compute_tables_from_scratch(num_tasks, stages, time, R, dead, delta):
             print('Error in compute_tables_from_scratch')
             exit()
 
@@ -117,8 +188,13 @@ class Dynamic:
             self.printSP()
         """
 
-        # Find optimal depths from the completed tables
-        depth_sched, reward_sched, time_sched = self.find_optimal_depths_from_tables(R, time, verbose)
+        # Find optimal depths from the completed tables (or without them, in low memory mode)
+        if self.low_memory:
+            depth_sched, reward_sched, time_sched = self.find_optimal_depths_low_memory(num_tasks, stages, time, R, dead)
+        elif self.pareto:
+            depth_sched, reward_sched, time_sched = self.find_optimal_depths_from_frontiers(R, time)
+        else:
+            depth_sched, reward_sched, time_sched = self.find_optimal_depths_from_tables(R, time, verbose)
 
         # If verbose, print out the solution schedule that was found... messily for now... 
         if verbose:
@@ -144,6 +220,113 @@ class Dynamic:
         self.depth_sched = depth_sched
         return depth_sched
 
+    def add_task(self, stages, time, prec, prio, dead):
+        """
+        Adds a single task to the tasks scheduled by the last call to sched (or add_task/remove_task)
+        and returns the updated depth schedule, without rebuilding the tables from scratch.
+
+        Tasks are kept in deadline order and row i of S and P only depends on rows 0..i-1, so only
+        the rows from the new task's position onwards are recomputed. Appending a task whose deadline
+        is the latest computes a single new row.
+        (With index='time' the time steps depend on the latest deadline, so the tables are rebuilt.)
+
+        stages      number of stages for the new task
+        time        time[l] is the expected runtime for the first l stages of the new task (cumulative)
+        prec        prec[l] is the expected precision achieved by running the first l stages of the new task
+        prio        priority of the new task
+        dead        deadline of the new task
+
+        returns depth_sched, where depth_sched[i] is the depth for the ith task in deadline order
+        """
+        # Check for correct inputs
+        if not len(time) == stages:
+            raise ValueError("time should have length stages")
+        if not len(prec) == stages:
+            raise ValueError("prec should have length stages")
+        if self.delta is None:
+            # The tasks added keep the delta chosen by the last call to sched
+            raise ValueError("with delta='auto', sched should be called before add_task")
+
+        R_new = [self.quantize(self.reward(prec[l], prio), self.delta) for l in range(stages)]
+
+        # The new task goes after every task with a deadline no later than its own
+        tasks = self.tasks
+        i = len(tasks['dead'])
+        while i > 0 and tasks['dead'][i-1] > dead:
+            i -= 1
+        for key, value in zip(('stages', 'time', 'prec', 'prio', 'dead', 'R'), (stages, time, prec, prio, dead, R_new)):
+            tasks[key].insert(i, value)
+
+        return self.update_tables_from(i)
+
+    def remove_task(self, task_idx=None):
+        """
+        Removes a task from the tasks held in the tables and returns the updated depth schedule.
+        Removing the last (latest deadline) task only drops its row; removing an earlier
+        task recomputes the rows after it.
+
+        task_idx    index (in deadline order) of the task to remove, the last task by default
+
+        returns depth_sched, where depth_sched[i] is the depth for the ith task in deadline order
+        """
+        tasks = self.tasks
+        N = len(tasks['dead'])
+        if task_idx is None:
+            task_idx = N - 1
+        if task_idx < 0 or task_idx >= N:
+            raise ValueError("task_idx should be the index of a scheduled task")
+        for key in tasks:
+            tasks[key].pop(task_idx)
+
+        return self.update_tables_from(task_idx)
+
+    def update_tables_from(self, first_row):
+        """
+        Brings S and P up to date with self.tasks, recomputing rows first_row onwards
+        (the earlier rows are unaffected by a change at or after first_row), and returns the new depth schedule.
+        """
+        tasks = self.tasks
+        N = len(tasks['dead'])
+        self.error_bound = N * self.delta
+        if N == 0:
+            self.depth_sched = []
+            return self.depth_sched
+
+        if self.low_memory:
+            # There are no tables to update in low memory mode
+            depth_sched, reward_sched, time_sched = self.find_optimal_depths_low_memory(
+                N, tasks['stages'], tasks['time'], tasks['R'], tasks['dead'])
+            self.depth_sched = depth_sched
+            return depth_sched
+
+        if self.pareto:
+            # Frontier i only depends on frontiers 0..i-1 as well
+            del self.F[first_row:]
+            for i in range(first_row, N):
+                self.compute_frontier(i, tasks['time'][i], tasks['R'][i], tasks['dead'][i])
+            depth_sched, reward_sched, time_sched = self.find_optimal_depths_from_frontiers(tasks['R'], tasks['time'])
+            self.depth_sched = depth_sched
+            return depth_sched
+
+        if self.index == 'time' or self.S_buf is None:
+            if self.index == 'time':
+                self.compute_time_tables_from_scratch(N, tasks['stages'], tasks['time'], tasks['R'], tasks['dead'])
+            else:
+                self.compute_tables_from_scratch(N, tasks['stages'], tasks['time'], tasks['R'], tasks['dead'], self.delta)
+        else:
+            # The tables only ever widen: columns past the widest reward reachable so far stay unachievable,
+            # so the results match a table built from scratch with the narrower width
+            Rmax_quantized_single_task = int(math.floor(max(max(R_i) for R_i in tasks['R'])))
+            W = max(Rmax_quantized_single_task * N + 1, self.S.shape[1])
+            depth_dtype = np.int8 if max(tasks['stages']) <= np.iinfo(np.int8).max else np.int16
+            self.reserve_tables(N, W, depth_dtype)
+            for i in range(first_row, N):
+                self.compute_table_row(i, tasks['time'][i], tasks['R'][i], tasks['dead'][i])
+
+        depth_sched, reward_sched, time_sched = self.find_optimal_depths_from_tables(tasks['R'], tasks['time'])
+        self.depth_sched = depth_sched
+        return depth_sched
+
     def compute_tables_from_scratch(self, num_tasks, stages, time, R, dead, delta):
         """
         Computes the solutions to S and P (tables as described by Yao et al)
@@ -179,93 +362,396 @@ class Dynamic:
         # Rmax_quantized is the maximum possible reward for a single task (quantized)
         Rmax_quantized_single_task = int(math.floor(max(max(R[i]) for i in range(len(R)))))
         Rmax_quantized = Rmax_quantized_single_task * N
+        W = Rmax_quantized + 1
+
+        # Depths are small integers, so S is stored in the narrowest integer type that can hold them
+        # (with -1 marking a reward level that cannot be achieved, where the list version used None)
+        depth_dtype = np.int8 if max(stages) <= np.iinfo(np.int8).max else np.int16
 
         # S[i][r] is the depth to which task i should be computed to optimally achieve at least reward r*delta but less than (r+1)*delta
-        self.S = [[None for r in range(Rmax_quantized+1)] for i in range(N)]
-
-        # P[i][r] is the time required to carry out the schedule implied by S[i][r]
-        self.P = [[POS_INF for r in range(Rmax_quantized+1)] for i in range(N)]
-
-        # Start by solving the first row of the table (first task)
-        i = 0
-        for r in range(Rmax_quantized+1): # for each level of reward
-            # We need to find the depth which achieves reward r in minimum time
-            # winning_l is that depth, and winning_t is the corresponding expected runtime
-            winning_l = None
-            winning_t = POS_INF
-            for l in range(len(time[i])):
-                # If this depth achieves reward r
-                if R[i][l] == r:
-                    # If this is the first such task, it is the current winner
-                    if winning_l is None:
-                        winning_l = l
-                        winning_t = time[i][l]
-                    # If the time to achieve this depth does so in less time than the current winner
-                    elif time[i][l] < winning_t:
-                        winning_l = l
-                        winning_t = time[i][l]
-            # Update this cell in S and P as long as the winning time abides by the task's deadline
-            if winning_l is not None and winning_t <= dead[i]:
-                self.S[i][r] = winning_l
-                self.P[i][r] = winning_t
+        # P[i][r] is the time required to carry out the schedule implied by S[i][r] (inf where S[i][r] is -1)
+        self.S_buf = None
+        self.P_buf = None
+        self.reserve_tables(N, W, depth_dtype)
+
+        # Each row is computed from the previous one (see compute_table_row)
+        for i in range(N):
+            self.compute_table_row(i, time[i], R[i], dead[i])
 
         """
         # Sanity check
         self.printSP()
         """
 
-        # Now for subsequent tasks we apply the same operations (i.e. inductively build the solutions)
-        for i in range(1, N):
-            for r in range(Rmax_quantized+1): # for each level of reward
-                # We need to find the depth which achieves reward r in minimum time
-                # winning_l is that depth, and winning_t is the corresponding expected runtime
-                winning_l = None
-                winning_t = POS_INF
-                # For each possible optimal depth, l
-                for l in range(len(time[i])):
-                    """ this won't work anymore, since we require the mandatory component of each task to be run first
-                    # If this depth achieves reward r on its own
-                    if R[i][l] == r:
-                        # If this is the first sufficient depth, it is the current winner
-                        #TODO remove this unneeded clause
-                        if winning_l is None:
-                            winning_l = l
-                            winning_t = time[i][l]
-                        # Otherwise, if the time to achieve this depth does so in less time than the current winner
-                        elif time[i][l] < winning_t:
-                            winning_l = l
-                            winning_t = time[i][l]
-                    # If this depth achieves reward r on its own
-                    # If this depth achieves some part of this reward but an earlier task
-                    # achieves the remainder of the reward, for a total of r still
-                    if R[i][l] < r:
-                    """
-                    # r_ is the remaining portion of r
-                    r_ = r - R[i][l] # HERE IS CHANGE
-                    # If the preceding task can earn the remaining portion of r
-                    if self.S[i-1][r_] is not None:
-                        # If this is the first sufficient depth, is is the current winner
-                        if winning_l is None:
-                            winning_l = l
-                            winning_t = time[i][l] + self.P[i-1][r_]
-                        # If the time to achieve this depth does so in less time than the current winner
-                        elif time[i][l] + self.P[i-1][r_] < winning_t:
-                            winning_l = l
-                            winning_t = time[i][l] + self.P[i-1][r_]
-         
-                # Update this cell in S and P as long as the winning time is less than the deadline for this task
-                if winning_l is not None and winning_t <= dead[i]:
-                    self.S[i][r] = winning_l
-                    self.P[i][r] = winning_t
+        # Return True on success
+        return True
 
+    def compute_table_row(self, i, time_i, R_i, dead_i):
         """
-        # Sanity check
-        self.printSP()
+        Computes row i of S and P from row i-1, all reward levels at once.
+
+        i           the task (row) to compute
+        time_i      time_i[l] is the expected runtime for the first l stages of task i (cumulative)
+        R_i         R_i[l] is the expected reward for the first l stages of task i (cumulative)(quantized)
+        dead_i      the deadline for task i
+        """
+        if i == 0:
+            P_prev = self.empty_row(self.S.shape[1])
+        else:
+            P_prev = self.P[i-1]
+        self.S[i], self.P[i] = self.next_table_row(P_prev, time_i, R_i, dead_i, self.S.dtype)
+
+    def empty_row(self, W):
+        """
+        Before the first task nothing has been run, so the only achievable reward is 0 and it takes no time.
+        Treating this as the row of P "above" the first task lets every row use the same recurrence.
+        """
+        P_prev = np.full(W, np.inf, dtype=np.float64)
+        P_prev[0] = 0
+        return P_prev
+
+    def next_table_row(self, P_prev, time_i, R_i, dead_i, depth_dtype):
+        """
+        Computes the next rows of S and P from the previous row of P, all reward levels at once.
+
+        P_prev      the previous row of P
+        time_i      time_i[l] is the expected runtime for the first l stages of this task (cumulative)
+        R_i         R_i[l] is the expected reward for the first l stages of this task (cumulative)(quantized)
+        dead_i      the deadline for this task
+        depth_dtype integer type of the returned row of S
+
+        returns S_row, P_row
+        """
+        W = len(P_prev)
+
+        if HAVE_NUMBA:
+            # The same recurrence, one reward level at a time in compiled code
+            S_row = np.empty(W, dtype=depth_dtype)
+            P_row = np.empty(W, dtype=np.float64)
+            table_row(P_prev, np.asarray(time_i, dtype=np.float64), np.asarray(R_i, dtype=np.int64), dead_i, S_row, P_row)
+            return S_row, P_row
+
+        # Running the task to depth l shifts the previous row's times right by R_i[l] and adds time_i[l].
+        # winning_t[r] / winning_l[r] hold the minimum time (and the depth achieving it) for reward r so far.
+        # Depths are visited in increasing order and only strictly better times win, so ties resolve
+        # to the shallowest depth exactly as in the original per-cell loops.
+        winning_t = np.full(W, np.inf, dtype=np.float64)
+        winning_l = np.full(W, -1, dtype=depth_dtype)
+        for l in range(len(time_i)):
+            shift = R_i[l]
+            # candidate times for rewards r >= shift, using the remainder r - shift from the previous row
+            candidate_t = P_prev[:W-shift] + time_i[l]
+            better = candidate_t < winning_t[shift:]
+            winning_t[shift:][better] = candidate_t[better]
+            winning_l[shift:][better] = l
+
+        # Keep only the cells whose winning time abides by this task's deadline
+        on_time = winning_t <= dead_i
+        return np.where(on_time, winning_l, -1).astype(depth_dtype), np.where(on_time, winning_t, np.inf)
+
+    def find_optimal_depths_low_memory(self, num_tasks, stages, time, R, dead):
+        """
+        Finds the same optimal depths as compute_tables_from_scratch followed by
+        find_optimal_depths_from_tables, without ever holding the full S and P tables.
+
+        The forward pass keeps only two rolling rows of P to find the highest achievable reward.
+        The depths are then recovered by divide-and-conquer recomputation (in the style of Hirschberg):
+        to backtrack through tasks lo..hi-1, the rows are recomputed up to the middle task, the right
+        half is solved first (giving the reward left over for the left half), and then the left half.
+        Only one row per level of recursion is alive at a time, so memory is O(W log N) instead of
+        O(N W), at the cost of O(log N) times more row computations.
+
+        num_tasks   number of tasks
+        stages      stages[i] is number of stages for task i
+        time        time[i][l] is the expected runtime for the first l stages of task i (cumulative)
+        R           R[i][l] is the expected reward for the first l stages of task i (cumulative)(quantized)
+        dead        dead[i] is the deadline for task i
+
+        returns depth_sched, reward_sched, time_sched as find_optimal_depths_from_tables does
+        """
+        N = num_tasks
+        Rmax_quantized_single_task = int(math.floor(max(max(R[i]) for i in range(len(R)))))
+        W = Rmax_quantized_single_task * N + 1
+        depth_dtype = np.int8 if max(stages) <= np.iinfo(np.int8).max else np.int16
+
+        # The tables are never built in this mode
+        self.S = None
+        self.P = None
+
+        # Forward pass with two rolling rows
+        P_first = self.empty_row(W)
+        P_row = P_first
+        for i in range(N):
+            _, P_row = self.next_table_row(P_row, time[i], R[i], dead[i], depth_dtype)
+
+        # The highest reward level the last task can be scheduled for
+        achievable = np.flatnonzero(P_row < np.inf)
+        if len(achievable) == 0:
+            return None, None, None
+        del P_row
+
+        depth_sched = [None] * N
+
+        def backtrack(lo, hi, P_entry, c):
+            """
+            Fills in depth_sched[lo:hi] given the row of P before task lo and the reward column c
+            reached after task hi-1, and returns the reward column before task lo.
+            """
+            if hi - lo == 1:
+                S_row, _ = self.next_table_row(P_entry, time[lo], R[lo], dead[lo], depth_dtype)
+                depth_sched[lo] = int(S_row[c])
+                return c - R[lo][depth_sched[lo]]
+            mid = (lo + hi) // 2
+            P_mid = P_entry
+            for i in range(lo, mid):
+                _, P_mid = self.next_table_row(P_mid, time[i], R[i], dead[i], depth_dtype)
+            c_mid = backtrack(mid, hi, P_mid, c)
+            del P_mid
+            return backtrack(lo, mid, P_entry, c_mid)
+
+        backtrack(0, N, P_first, int(achievable[-1]))
+
+        reward_sched = [R[i][depth_sched[i]] for i in range(N)]
+        time_sched = [time[i][depth_sched[i]] for i in range(N)]
+        return depth_sched, reward_sched, time_sched
+
+    def reserve_tables(self, N, W, depth_dtype):
+        """
+        Points S and P at the first N rows and W columns of their backing arrays, growing the
+        backing arrays geometrically when they are too small so that tasks can be added one at a time
+        without copying the tables on every call. Cells that have never been computed are unachievable.
+
+        N           number of rows (tasks)
+        W           number of columns (quantized reward levels)
+        depth_dtype integer type needed to hold the depths in S
         """
+        if self.S_buf is None:
+            self.S_buf = np.full((N, W), -1, dtype=depth_dtype)
+            self.P_buf = np.full((N, W), np.inf, dtype=np.float64)
+        else:
+            rows, cols = self.S_buf.shape
+            if np.iinfo(depth_dtype).max > np.iinfo(self.S_buf.dtype).max:
+                self.S_buf = self.S_buf.astype(depth_dtype)
+            if N > rows or W > cols:
+                new_rows = max(N, 2 * rows) if N > rows else rows
+                new_cols = max(W, 2 * cols) if W > cols else cols
+                S_buf = np.full((new_rows, new_cols), -1, dtype=self.S_buf.dtype)
+                P_buf = np.full((new_rows, new_cols), np.inf, dtype=np.float64)
+                S_buf[:rows, :cols] = self.S_buf
+                P_buf[:rows, :cols] = self.P_buf
+                self.S_buf = S_buf
+                self.P_buf = P_buf
+        self.S = self.S_buf[:N, :W]
+        self.P = self.P_buf[:N, :W]
+
+    def compute_time_tables_from_scratch(self, num_tasks, stages, time, R, dead):
+        """
+        Computes the time-indexed dual of the S and P tables: a knapsack table over discretized
+        time holding the best quantized reward, so the table width depends on the deadline
+        resolution (time_steps) rather than on delta and the number of tasks.
+
+        Stage times are rounded up and deadlines rounded down to whole time steps, so any
+        schedule found in the discretized problem also meets the real deadlines.
+
+        num_tasks   number of tasks
+        stages      stages[i] is number of stages for task i
+        time        time[i][l] is the expected runtime for the first l stages of task i (cumulative)
+        R           R[i][l] is the expected reward for the first l stages of task i (cumulative)(quantized)
+        dead        dead[i] is the deadline for task i
+
+        returns True once S, Q (and T, the discretized times) are completed
+        """
+        # Check for correct inputs
+        if not isinstance(num_tasks, int) or num_tasks < 0:
+            raise ValueError("num_tasks should be a positive integer")
+        if not len(stages) == num_tasks:
+            raise ValueError("stages should have length num_tasks")
+        if not len(time) == num_tasks:
+            raise ValueError("time should have length num_tasks")
+        for task_idx, time_list in enumerate(time):
+            if not len(time_list) == stages[task_idx]:
+                raise ValueError("time[i] should have length stages[i]")
+        for task_idx, R_list in enumerate(R):
+            if not len(R_list) == stages[task_idx]:
+                raise ValueError("R[i] should have length stages[i]")
+        if not len(dead) == num_tasks:
+            raise ValueError("dead should have length num_tasks")
+
+        # Establish shorthand variable names
+        N = num_tasks
+
+        # time_delta is the length of one time step
+        time_delta = max(dead) / self.time_steps
+        if time_delta <= 0:
+            # No time at all is available, so nothing can be scheduled
+            self.S = np.full((N, 1), -1, dtype=np.int8)
+            self.Q = np.full((N, 1), -1, dtype=np.int64)
+            return True
+
+        # T[i][l] is the (rounded up) number of time steps needed to run the first l stages of task i
+        self.T = []
+        for i in range(N):
+            self.T.append([int(math.ceil(time[i][l] / time_delta)) for l in range(len(time[i]))])
+        # D[i] is the (rounded down) number of time steps before the deadline of task i
+        D = [int(math.floor(dead[i] / time_delta)) for i in range(N)]
+        W = max(D) + 1
+
+        depth_dtype = np.int8 if max(stages) <= np.iinfo(np.int8).max else np.int16
+
+        # S[i][t] is the depth for task i in the best schedule of the first i tasks taking exactly t time steps
+        self.S = np.full((N, W), -1, dtype=depth_dtype)
+
+        # Q[i][t] is the quantized reward of that schedule (-1 where no schedule takes exactly t steps)
+        self.Q = np.full((N, W), -1, dtype=np.int64)
+
+        # As in compute_tables_from_scratch, the row "above" the first task is the empty schedule
+        Q_prev = np.full(W, -1, dtype=np.int64)
+        Q_prev[0] = 0
+
+        # Running task i to depth l shifts the previous row right by T[i][l] time steps and adds R[i][l].
+        # Depths are visited in increasing order and only strictly better rewards win.
+        for i in range(N):
+            winning_r = np.full(W, -1, dtype=np.int64)
+            winning_l = np.full(W, -1, dtype=depth_dtype)
+            for l in range(len(time[i])):
+                shift = self.T[i][l]
+                if shift >= W:
+                    continue
+                reachable = Q_prev[:W-shift] >= 0
+                candidate_r = np.where(reachable, Q_prev[:W-shift] + R[i][l], -1)
+                better = candidate_r > winning_r[shift:]
+                winning_r[shift:][better] = candidate_r[better]
+                winning_l[shift:][better] = l
+
+            # Keep only the cells that abide by this task's deadline
+            on_time = slice(0, max(D[i] + 1, 0))
+            self.S[i][on_time] = winning_l[on_time]
+            self.Q[i][on_time] = winning_r[on_time]
+            Q_prev = self.Q[i]
 
         # Return True on success
         return True
 
+    def compute_frontiers_from_scratch(self, num_tasks, stages, time, R, dead):
+        """
+        A sparse alternative to compute_tables_from_scratch.
+
+        Most cells of the dense P table are either unachievable or dominated: some higher reward
+        is reachable in no more time. A dominated state can never lead to a better schedule than
+        the state dominating it, so for each prefix of tasks only the Pareto frontier of
+        (time, reward) states is kept, and states whose time already exceeds the deadline are dropped.
+        The highest reward on the last frontier is the same optimum the dense tables find.
+
+        The work here grows with the size of the frontiers rather than with the width of the tables
+        (W = N * Rmax / delta), so it wins when delta is fine compared to the number of tasks.
+        On the simulated problems (see problems.gen_problems), with the numba kernels, it is:
+            - 2x to 7x slower than the dense tables at delta .01 (10 to 300 tasks),
+            - about as fast at delta .001 on 10 to 30 tasks, and slower on more,
+            - 16x faster at delta .0001 on 10 tasks, 10x on 30 and 4x on 100, and on 300 tasks it
+              finishes in about 8s where the dense P table alone would need 6.5 GiB.
+        Without numba the dense rows are slower, so the frontiers win sooner.
+
+        F[i] is the frontier after task i, as a tuple of arrays (reward, time, depth, parent) sorted by
+        increasing reward (and so increasing time), where depth is the depth of task i in that state and
+        parent is the index of the state in F[i-1] it extends.
+
+        num_tasks   number of tasks
+        stages      stages[i] is number of stages for task i
+        time        time[i][l] is the expected runtime for the first l stages of task i (cumulative)
+        R           R[i][l] is the expected reward for the first l stages of task i (cumulative)(quantized)
+        dead        dead[i] is the deadline for task i
+
+        returns True once F is completed
+        """
+        # Check for correct inputs
+        if not isinstance(num_tasks, int) or num_tasks < 0:
+            raise ValueError("num_tasks should be a positive integer")
+        if not len(stages) == num_tasks:
+            raise ValueError("stages should have length num_tasks")
+        if not len(time) == num_tasks:
+            raise ValueError("time should have length num_tasks")
+        for task_idx, time_list in enumerate(time):
+            if not len(time_list) == stages[task_idx]:
+                raise ValueError("time[i] should have length stages[i]")
+        for task_idx, R_list in enumerate(R):
+            if not len(R_list) == stages[task_idx]:
+                raise ValueError("R[i] should have length stages[i]")
+        if not len(dead) == num_tasks:
+            raise ValueError("dead should have length num_tasks")
+
+        self.F = []
+        for i in range(num_tasks):
+            self.compute_frontier(i, time[i], R[i], dead[i])
+
+        # Return True on success
+        return True
+
+    def compute_frontier(self, i, time_i, R_i, dead_i):
+        """
+        Computes frontier i from frontier i-1 and appends it to F.
+
+        i           the task to compute the frontier after
+        time_i      time_i[l] is the expected runtime for the first l stages of task i (cumulative)
+        R_i         R_i[l] is the expected reward for the first l stages of task i (cumulative)(quantized)
+        dead_i      the deadline for task i
+        """
+        if i == 0:
+            # The empty schedule: no reward in no time
+            prev_r = np.zeros(1, dtype=np.int64)
+            prev_t = np.zeros(1, dtype=np.float64)
+        else:
+            prev_r, prev_t, _, _ = self.F[i-1]
+        num_prev = len(prev_r)
+
+        # Every state of the previous frontier extended by every depth of task i
+        L = len(time_i)
+        cand_r = (prev_r[None, :] + np.asarray(R_i, dtype=np.int64)[:, None]).ravel()
+        cand_t = (prev_t[None, :] + np.asarray(time_i, dtype=np.float64)[:, None]).ravel()
+        cand_l = np.repeat(np.arange(L), num_prev)
+        cand_parent = np.tile(np.arange(num_prev), L)
+
+        # Drop the states that miss this task's deadline
+        on_time = cand_t <= dead_i
+        cand_r, cand_t, cand_l, cand_parent = cand_r[on_time], cand_t[on_time], cand_l[on_time], cand_parent[on_time]
+
+        # Sorted by decreasing reward (then increasing time, then shallowest depth),
+        # a state is on the frontier if it is strictly faster than every state before it
+        order = np.lexsort((cand_l, cand_t, -cand_r))
+        cand_t_sorted = cand_t[order]
+        faster_than_before = np.ones(len(order), dtype=bool)
+        if len(order) > 1:
+            faster_than_before[1:] = cand_t_sorted[1:] < np.minimum.accumulate(cand_t_sorted)[:-1]
+        keep = order[faster_than_before][::-1]
+
+        self.F.append((cand_r[keep], cand_t[keep], cand_l[keep], cand_parent[keep]))
+
+    def find_optimal_depths_from_frontiers(self, R, time):
+        """
+        Finds the optimal path through the frontiers computed by compute_frontiers_from_scratch:
+        the highest reward state of the last frontier, followed back through its parents.
+
+        R       rewards
+        time    time table
+
+        returns depth_sched, reward_sched, time_sched as find_optimal_depths_from_tables does
+        """
+        N = len(self.F)
+
+        # If the last frontier is empty this is an unschedulable set of inputs
+        if len(self.F[N-1][0]) == 0:
+            return None, None, None
+
+        depth_sched = [None] * N
+        state = len(self.F[N-1][0]) - 1
+        for i in range(N-1, -1, -1):
+            _, _, depths, parents = self.F[i]
+            depth_sched[i] = int(depths[state])
+            state = parents[state]
+
+        reward_sched = [R[i][depth_sched[i]] for i in range(N)]
+        time_sched = [time[i][depth_sched[i]] for i in range(N)]
+        return depth_sched, reward_sched, time_sched
+
     def find_optimal_depths_from_tables(self, R, time, verbose=False):
         """
         Now that the tables are completed, we find the optimal path using the tables
@@ -282,13 +768,22 @@ class Dynamic:
         i = N - 1
         # l_max is the optimal layer as described above
         l_max = None
-        # r_max is the corresponding quantized reward
-        r_max = None
-        # For each reward for this task
-        for r in range(len(self.S[i])):
-            if self.S[i][r] is not None:
-                r_max = r
-                l_max = self.S[i][r]
+        # c_max is the corresponding table column: the quantized reward (or, when indexed by time,
+        # the number of time steps used) and step[i][l] is how far depth l of task i moves along the columns
+        c_max = None
+        if self.index == 'time':
+            # The highest reward this task can be scheduled for, taking the fewest time steps
+            step = self.T
+            if self.Q[i].max() >= 0:
+                c_max = int(np.argmax(self.Q[i]))
+                l_max = int(self.S[i][c_max])
+        else:
+            # The highest reward level this task can be scheduled for (S is -1 where a reward is unachievable)
+            step = R
+            achievable = np.flatnonzero(self.S[i] >= 0)
+            if len(achievable) > 0:
+                c_max = int(achievable[-1])
+                l_max = int(self.S[i][c_max])
 
         # If there is not possible order for this task... this is an unschedulable set of inputs
         if l_max is None:
@@ -297,19 +792,19 @@ class Dynamic:
 
         # Now we construct the optimal schedule
         l_cur = l_max
-        # r_ is the remaining reward
-        r_ = r_max - R[N-1][l_max]
+        # c_ is the remaining column (remaining reward, or remaining time steps)
+        c_ = c_max - step[N-1][l_max]
         depth_sched = [l_cur]
         reward_sched = [R[N-1][l_max]]
         time_sched = [time[N-1][l_max]]
         for i in range(N-2, -1, -1):
-            l_cur = self.S[i][r_]
-            r_ = r_ - R[i][l_cur]
+            l_cur = int(self.S[i][c_])
+            c_ = c_ - step[i][l_cur]
             depth_sched.insert(0, l_cur)
             reward_sched.insert(0, R[i][l_cur])
             time_sched.insert(0, time[i][l_cur])
             """
-            if r_ == 0:
+            if c_ == 0:
                 #TODO remove this since it is outdated if the assumption is that all first layers are manditory
                 # if 0 reward remains, the remaining tasks should all have depth 0
                 for j in range(i):
@@ -353,16 +848,10 @@ class Dynamic:
         P = self.P
         print("\nS:")
         for i in range(len(S)):
-            if S[i] == POS_INF:
-                s = 'INF'
-            else:
-                s = str(S[i])
+            s = " ".join('-' if l < 0 else str(l) for l in S[i])
             print(str(i)+": "+s+"  ")
         print("P:")
         for i in range(len(P)):
-            if P[i] == POS_INF:
-                s = 'INF'
-            else:
-                s = str(P[i])
+            s = " ".join('INF' if t == np.inf else str(t) for t in P[i])
             print(str(i)+": "+s+"  ")
         print("\n")
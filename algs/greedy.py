@@ -1,6 +1,7 @@
 """
 Simple greedy algorithm for the single processor, indepedent tasks model.
-Assumes same deadline for all tasks.
+Tasks may have different deadlines: they run in the order given (earliest deadline first),
+and slacktree.py checks that every task still meets its deadline as stages are added.
 
 Schedules mandatory parts then simply adds optional parts in order of priority.
 """
@@ -8,6 +9,8 @@ Schedules mandatory parts then simply adds optional parts in order of priority.
 import numpy as np
 import math
 
+from problems import Problem
+
 POS_INF = 10**10 
 
 class Greedy():
@@ -30,55 +33,39 @@ class Greedy():
         prio        prio[i] is the priority for task i
         dead        dead[i] is the deadline for task i
 
+        """
+        return self.sched_problem(Problem(num_tasks, stages, time, prec, prio, dead), verbose)
+
+    def sched_problem(self, problem, verbose=False):
+        """
+        Schedules the tasks of problem (a problems.Problem), as sched does.
+        The priority order and the slack tree come from problem.
         """
 
         # Check for correct inputs
-        if not isinstance(num_tasks, int) or num_tasks < 0:
-            raise ValueError("num_tasks should be a positive integer")
-        if not len(stages) == num_tasks:
-            raise ValueError("stages should have length num_tasks")
-        if not len(time) == num_tasks:
-            raise ValueError("time should have length num_tasks")
-        for task_idx, time_list in enumerate(time):
-            if not len(time_list) == stages[task_idx]:
-                raise ValueError("time[i] should have length stages[i]")
-        for task_idx, prec_list in enumerate(prec):
-            if not len(prec_list) == stages[task_idx]:
-                raise ValueError("prec[i] should have length stages[i]")
-        if not len(prec) == num_tasks:
-            raise ValueError("prec should have length num_tasks")
-        if not len(prio) == num_tasks:
-            raise ValueError("prio should have length num_tasks")
-        if not len(dead) == num_tasks:
-            raise ValueError("dead should have length num_tasks")
+        problem.check()
+        num_tasks, stages, time, prec, prio, dead = problem.args
 
         # intially, we need to schedule the mandatory components
         depth_sched = [0] * num_tasks
 
-        # check how much time is needed by mandatory parts of tasks
-        mand_time = 0
-        for i in range(len(time)):
-            mand_time += time[i][0] #first stage encapsulates all mandatory work for a task
-
         # if extra time, we keep scheduling
-        deadline = dead[0] #assume same deadline for all tasks
-        if mand_time > deadline:
+        slack = problem.slack_tree()
+        if slack is None:
             return None
 
         # get the indexes of the highest priority tasks
-        prio = np.array(prio)
-        highest_prio_tasks = np.argsort(-1*prio)
+        prio = problem.prio_array
+        highest_prio_tasks = problem.prio_order
 
         # now for each task in order of highest priority, add as any layers as we can fit in
-        time_used = mand_time
         for taskidx in highest_prio_tasks:
             # see how many layers we can fit in for this task (start at last layer since we have cumulative times)
             #for l in range(0, stages[taskidx], 1):
             for l in range(stages[taskidx] - 1, 0, -1):
                 #need to subtract first, since times are cumulative; only want one time for each task, not for them to be added multiple times
-                if time_used + time[taskidx][l] - time[taskidx][0] <= deadline:
-                    time_used += time[taskidx][l]
-                    time_used -= time[taskidx][0]
+                if slack.fits(taskidx, time[taskidx][l] - time[taskidx][0]):
+                    slack.add_time(taskidx, time[taskidx][l] - time[taskidx][0])
                     depth_sched[taskidx] = l
                     break
 
@@ -1,6 +1,7 @@
 """
 Simple greedy algorithm for the single processor, indepedent tasks model.
-Assumes same deadline for all tasks.
+Tasks may have different deadlines: they run in the order given (earliest deadline first),
+and slacktree.py checks that every task still meets its deadline as stages are added.
 
 Schedules mandatory parts then simply adds optional parts in order of priority.
 """
@@ -8,6 +9,9 @@ Schedules mandatory parts then simply adds optional parts in order of priority.
 import numpy as np
 import math
 
+from kernels import HAVE_NUMBA, greedy_kyle_sweep
+from problems import Problem
+
 POS_INF = 10**10 
 
 class GreedyKyle():
@@ -30,50 +34,44 @@ class GreedyKyle():
         prio        prio[i] is the priority for task i
         dead        dead[i] is the deadline for task i
 
+        """
+        return self.sched_problem(Problem(num_tasks, stages, time, prec, prio, dead), verbose)
+
+    def sched_problem(self, problem, verbose=False):
+        """
+        Schedules the tasks of problem (a problems.Problem), as sched does.
+        The priority order, the slack tree and the padded arrays for the compiled sweep come from problem.
         """
 
         # Check for correct inputs
-        if not isinstance(num_tasks, int) or num_tasks < 0:
-            raise ValueError("num_tasks should be a positive integer")
-        if not len(stages) == num_tasks:
-            raise ValueError("stages should have length num_tasks")
-        if not len(time) == num_tasks:
-            raise ValueError("time should have length num_tasks")
-        for task_idx, time_list in enumerate(time):
-            if not len(time_list) == stages[task_idx]:
-                raise ValueError("time[i] should have length stages[i]")
-        for task_idx, prec_list in enumerate(prec):
-            if not len(prec_list) == stages[task_idx]:
-                raise ValueError("prec[i] should have length stages[i]")
-        if not len(prec) == num_tasks:
-            raise ValueError("prec should have length num_tasks")
-        if not len(prio) == num_tasks:
-            raise ValueError("prio should have length num_tasks")
-        if not len(dead) == num_tasks:
-            raise ValueError("dead should have length num_tasks")
+        problem.check()
+        num_tasks, stages, time, prec, prio, dead = problem.args
 
         # intially, we need to schedule the mandatory components
         depth_sched = [0] * num_tasks
 
-        # check how much time is needed by mandatory parts of tasks
-        mand_time = 0
-        for i in range(len(time)):
-            mand_time += time[i][0] #first stage encapsulates all mandatory work for a task
-
         # if extra time, we keep scheduling
 
         ####### KVC: WOULD A BETTER ASSUMPTION BE THAT IT IS THE MINIMUM IN THE DEADLINE ARRAY?##########
 
-        deadline = dead[0] #assume same deadline for all tasks
-        if mand_time > deadline:
+        slack = problem.slack_tree()
+        if slack is None:
             return None
 
         # get the indexes of the highest priority tasks
-        prio = np.array(prio)
-        highest_prio_tasks = np.argsort(-1*prio)
+        prio = problem.prio_array
+        highest_prio_tasks = problem.prio_order
+
+        if HAVE_NUMBA and num_tasks > 0:
+            # Run the sweeps below in compiled code
+            depth_sched = np.zeros(num_tasks, dtype=np.int64)
+            greedy_kyle_sweep(problem.stages_array, problem.time_array, problem.prec_array,
+                              problem.prio_array, highest_prio_tasks,
+                              np.array(slack.t, dtype=np.float64), np.array(slack.d, dtype=np.float64), depth_sched)
+            self.depth_sched = depth_sched.tolist()
+            return self.depth_sched
  
         # now we add as many optional layers as possible, in order of greedy heuristic(s)
-        time_used = mand_time
         idx = 0
         taskidx = highest_prio_tasks[idx]
         leftheur = 0
@@ -90,21 +88,21 @@ class GreedyKyle():
         
           taskidx = highest_prio_tasks[idx]
 
-          if idx == left and (depth_sched[taskidx] + 1 >= stages[taskidx] or time_used + (time[taskidx][depth_sched[taskidx]+1]) > deadline):
+          if idx == left and (depth_sched[taskidx] + 1 >= stages[taskidx] or not slack.fits(taskidx, time[taskidx][depth_sched[taskidx]+1])):
               left += 1
               idx = left
 
           elif idx == left:
               leftheur = heuristic(prec[taskidx][depth_sched[taskidx] + 1] - prec[taskidx][depth_sched[taskidx]], prio[taskidx], time[taskidx][depth_sched[taskidx] + 1] - time[taskidx][depth_sched[taskidx]])
-              time_used = time_used + time[taskidx][depth_sched[taskidx] + 1] - time[taskidx][depth_sched[taskidx]]
+              slack.add_time(taskidx, time[taskidx][depth_sched[taskidx] + 1] - time[taskidx][depth_sched[taskidx]])
               depth_sched[taskidx] += 1
               idx += 1
 
           else:
-              if depth_sched[taskidx] + 1 < stages[taskidx] and time_used + (time[taskidx][depth_sched[taskidx]+1]) <= deadline:
+              if depth_sched[taskidx] + 1 < stages[taskidx] and slack.fits(taskidx, time[taskidx][depth_sched[taskidx]+1]):
                   curheur = heuristic(prec[taskidx][depth_sched[taskidx] + 1] - prec[taskidx][depth_sched[taskidx]], prio[taskidx], time[taskidx][depth_sched[taskidx] + 1] - time[taskidx][depth_sched[taskidx]])
                   if curheur > leftheur:
-                      time_used = time_used + time[taskidx][depth_sched[taskidx] + 1] - time[taskidx][depth_sched[taskidx]]
+                      slack.add_time(taskidx, time[taskidx][depth_sched[taskidx] + 1] - time[taskidx][depth_sched[taskidx]])
                       depth_sched[taskidx] += 1
                       idx += 1
 
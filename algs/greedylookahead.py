@@ -7,6 +7,7 @@ Schedules mandatory parts then simply adds optional parts in order of priority.
 
 import numpy as np
 import math
+from problems import Problem
 
 POS_INF = 10**10 
 
@@ -30,35 +31,24 @@ class GreedyLookAhead():
         prio        prio[i] is the priority for task i
         dead        dead[i] is the deadline for task i
 
+        """
+        return self.sched_problem(Problem(num_tasks, stages, time, prec, prio, dead), verbose)
+
+    def sched_problem(self, problem, verbose=False):
+        """
+        Schedules the tasks of problem (a problems.Problem), as sched does.
+        The mandatory time, the priority order and the marginal heuristic table come from problem.
         """
 
         # Check for correct inputs
-        if not isinstance(num_tasks, int) or num_tasks < 0:
-            raise ValueError("num_tasks should be a positive integer")
-        if not len(stages) == num_tasks:
-            raise ValueError("stages should have length num_tasks")
-        if not len(time) == num_tasks:
-            raise ValueError("time should have length num_tasks")
-        for task_idx, time_list in enumerate(time):
-            if not len(time_list) == stages[task_idx]:
-                raise ValueError("time[i] should have length stages[i]")
-        for task_idx, prec_list in enumerate(prec):
-            if not len(prec_list) == stages[task_idx]:
-                raise ValueError("prec[i] should have length stages[i]")
-        if not len(prec) == num_tasks:
-            raise ValueError("prec should have length num_tasks")
-        if not len(prio) == num_tasks:
-            raise ValueError("prio should have length num_tasks")
-        if not len(dead) == num_tasks:
-            raise ValueError("dead should have length num_tasks")
+        problem.check()
+        num_tasks, stages, time, prec, prio, dead = problem.args
 
         # intially, we need to schedule the mandatory components
         depth_sched = [0] * num_tasks
 
         # check how much time is needed by mandatory parts of tasks
-        mand_time = 0
-        for i in range(len(time)):
-            mand_time += time[i][0] #first stage encapsulates all mandatory work for a task
+        mand_time = problem.mand_time
 
         # if extra time, we keep scheduling
         deadline = dead[0] #assume same deadline for all tasks
@@ -66,12 +56,8 @@ class GreedyLookAhead():
             return None
 
         # get the indexes of the highest priority tasks
-        prio = np.array(prio)
-        highest_prio_tasks = np.argsort(-1*prio)
-
-        # get the tasks sorted in order of priority
-        prio = np.array(prio)
-        highest_prio_tasks = np.argsort(-1*prio)
+        prio = problem.prio_array
+        highest_prio_tasks = problem.prio_order
 
  
         # now we add as many optional layers as possible, in order of greedy heuristic(s)
@@ -82,14 +68,8 @@ class GreedyLookAhead():
         left = 0
         no_more = 0
         # before looping around the search space, let's build up a table of heuristic evaluations of each stage
-        heur_table = [];
-        for i in range(num_tasks):
-            heur_table.append([])
-            for j in range(stages[i]):
-                if j > 0:
-                    heur_table[i].append(heuristic(prec[i][j] - prec[i][j-1], prio[i], time[i][j] - time[i][j-1]))
-                else:
-                    heur_table[i].append(heuristic(prec[i][j], prio[i], time[i][j]))
+        # (computed once per problem, see problems.Problem.marginal_heur_table)
+        heur_table = problem.marginal_heur_table
         # now never need to bother to compute the heuristic values but instead can use that look up table
         while True:
             # now we consider adding stage stag to the schedule for task taskidx
@@ -139,7 +119,7 @@ class GreedyLookAhead():
                 task_idx_klook = highest_prio_tasks[idx + i];
                 if depth_sched[task_idx_klook] + 1 > stages[task_idx_klook]:
                     break
-                sumklook += heur_table[task_idx_klook][depth_sched[taskidx] + 1]
+                sumklook += heur_table[task_idx_klook, depth_sched[taskidx] + 1]
                 counter += 1
                 i += 1
             avgheur = sumklook / counter
@@ -1,6 +1,7 @@
 """
 Simple greedy algorithm for the single processor, indepedent tasks model.
-Assumes same deadline for all tasks.
+Tasks may have different deadlines: they run in the order given (earliest deadline first),
+and slacktree.py checks that every task still meets its deadline as stages are added.
 
 Schedules mandatory parts then simply adds optional parts in order of priority.
 """
@@ -8,6 +9,9 @@ Schedules mandatory parts then simply adds optional parts in order of priority.
 import numpy as np
 import math
 
+from kernels import HAVE_NUMBA, greedy_prime_sweep
+from problems import Problem
+
 POS_INF = 10**10 
 
 class GreedyPrime():
@@ -30,52 +34,41 @@ class GreedyPrime():
         prio        prio[i] is the priority for task i
         dead        dead[i] is the deadline for task i
 
+        """
+        return self.sched_problem(Problem(num_tasks, stages, time, prec, prio, dead), verbose)
+
+    def sched_problem(self, problem, verbose=False):
+        """
+        Schedules the tasks of problem (a problems.Problem), as sched does.
+        The priority order, the slack tree and the padded arrays for the compiled sweep come from problem.
         """
 
         # Check for correct inputs
-        if not isinstance(num_tasks, int) or num_tasks < 0:
-            raise ValueError("num_tasks should be a positive integer")
-        if not len(stages) == num_tasks:
-            raise ValueError("stages should have length num_tasks")
-        if not len(time) == num_tasks:
-            raise ValueError("time should have length num_tasks")
-        for task_idx, time_list in enumerate(time):
-            if not len(time_list) == stages[task_idx]:
-                raise ValueError("time[i] should have length stages[i]")
-        for task_idx, prec_list in enumerate(prec):
-            if not len(prec_list) == stages[task_idx]:
-                raise ValueError("prec[i] should have length stages[i]")
-        if not len(prec) == num_tasks:
-            raise ValueError("prec should have length num_tasks")
-        if not len(prio) == num_tasks:
-            raise ValueError("prio should have length num_tasks")
-        if not len(dead) == num_tasks:
-            raise ValueError("dead should have length num_tasks")
+        problem.check()
+        num_tasks, stages, time, prec, prio, dead = problem.args
 
         # intially, we need to schedule the mandatory components
         depth_sched = [0] * num_tasks
 
-        # check how much time is needed by mandatory parts of tasks
-        mand_time = 0
-        for i in range(len(time)):
-            mand_time += time[i][0] #first stage encapsulates all mandatory work for a task
-
         # if extra time, we keep scheduling
-        deadline = dead[0] #assume same deadline for all tasks
-        if mand_time > deadline:
+        slack = problem.slack_tree()
+        if slack is None:
             return None
 
         # get the indexes of the highest priority tasks
-        prio = np.array(prio)
-        highest_prio_tasks = np.argsort(-1*prio)
-
-        # get the tasks sorted in order of priority
-        prio = np.array(prio)
-        highest_prio_tasks = np.argsort(-1*prio)
-
+        prio = problem.prio_array
+        highest_prio_tasks = problem.prio_order
+
+        if HAVE_NUMBA and num_tasks > 0:
+            # Run the sweeps below in compiled code
+            depth_sched = np.zeros(num_tasks, dtype=np.int64)
+            greedy_prime_sweep(problem.stages_array, problem.time_array, problem.prec_array,
+                               problem.prio_array, highest_prio_tasks,
+                               np.array(slack.t, dtype=np.float64), np.array(slack.d, dtype=np.float64), depth_sched)
+            self.depth_sched = depth_sched.tolist()
+            return self.depth_sched
  
         # now we add as many optional layers as possible, in order of greedy heuristic(s)
-        time_used = mand_time
         idx = 0
         taskidx = highest_prio_tasks[idx]
         nextheur = 0
@@ -112,7 +105,7 @@ class GreedyPrime():
 
                 continue
             # if this stage doesn't fit in the schedule, move on
-            if time_used + (time[taskidx][stag] - time[taskidx][stag-1]) > deadline:
+            if not slack.fits(taskidx, time[taskidx][stag] - time[taskidx][stag-1]):
                 # couldn't add this stage since runtime would exceed the deadline
 
                 #### Kyle Comment: This scares me that we may be recounting tasks that have been addressed as "no_more" since if it is not the left,
@@ -146,7 +139,7 @@ class GreedyPrime():
             if curheur >= nextheur or idx == left: #if back at left, we automatically add one stage
                 # add this to the depth schedule
                 depth_sched[taskidx] = stag
-                time_used += time[taskidx][stag] - time[taskidx][stag-1] 
+                slack.add_time(taskidx, time[taskidx][stag] - time[taskidx][stag-1])
                 #(next line assumes that stag-1 exists which is true when the first (mandatory stage) has been added)
                 #print('setting depth_sched[',taskidx,'] to',stag)
                 if idx == left:
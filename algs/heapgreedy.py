@@ -0,0 +1,96 @@
+"""
+Heap-based greedy algorithm for the single processor, indepedent tasks model.
+Assumes same deadline for all tasks.
+
+Schedules mandatory parts then repeatedly adds the next stage (of any task) with the
+best marginal heuristic (added precision * priority / added time), keeping each task's
+next stage in a max-heap. Each of the S stages is pushed and popped at most once,
+so scheduling takes O(S log S) time.
+"""
+
+import numpy as np
+import math
+import heapq
+from problems import Problem
+
+POS_INF = 10**10 
+
+class HeapGreedy():
+    # The maintained list of optimal depths. 
+    # That is, depth_sched[i] is the number of stages to be run for task i in the selected schedule.
+    # i.e. this is where the solution for the current optimal schedule gets stored
+    depth_sched = []
+
+    def __init__(self):
+        self.depth_sched = []
+
+    def sched(self, num_tasks, stages, time, prec, prio, dead, verbose=False):
+        """
+        Schedules the passed tasks with associated metadata
+
+        num_tasks   number of tasks
+        stages      stages[i] is number of stages for task i
+        time        time[i][l] is the expected runtime for the first l stages of task i (cumulative)
+        prec        prec[i][l] is the expected precision achieved by running the first l stages of task i
+        prio        prio[i] is the priority for task i
+        dead        dead[i] is the deadline for task i
+
+        """
+        return self.sched_problem(Problem(num_tasks, stages, time, prec, prio, dead), verbose)
+
+    def sched_problem(self, problem, verbose=False):
+        """
+        Schedules the tasks of problem (a problems.Problem), as sched does.
+        The mandatory time comes from problem.
+        """
+
+        # Check for correct inputs
+        problem.check()
+        num_tasks, stages, time, prec, prio, dead = problem.args
+
+        # intially, we need to schedule the mandatory components
+        depth_sched = [0] * num_tasks
+
+        # check how much time is needed by mandatory parts of tasks
+        mand_time = problem.mand_time
+
+        # if extra time, we keep scheduling
+        deadline = dead[0] #assume same deadline for all tasks
+        if mand_time > deadline:
+            return None
+        time_used = mand_time
+
+        # the heap holds (-heuristic, task, stage) for the next stage of every task that has one,
+        # so popping gives the stage with the best marginal heuristic (ties go to the lowest task index)
+        heap = []
+        for i in range(num_tasks):
+            if stages[i] > 1:
+                heap.append((-marginal_heuristic(prec, prio, time, i, 1), i, 1))
+        heapq.heapify(heap)
+
+        while heap:
+            _, taskidx, stag = heapq.heappop(heap)
+            new_time_added = time[taskidx][stag] - time[taskidx][stag-1]
+            if time_used + new_time_added > deadline:
+                # this stage doesn't fit, and every later stage of this task needs it, so the task is done
+                continue
+            # add this stage to the depth schedule and offer up the task's next stage
+            depth_sched[taskidx] = stag
+            time_used += new_time_added
+            if stag + 1 < stages[taskidx]:
+                heapq.heappush(heap, (-marginal_heuristic(prec, prio, time, taskidx, stag + 1), taskidx, stag + 1))
+
+        # Return the depth schedule (EDF is used for the server to dispatch tasks)
+        self.depth_sched = depth_sched
+        return depth_sched
+
+def marginal_heuristic(prec, prio, time, taskidx, stag):
+    """ Returns the heuristic for adding stage stag of task taskidx, given that stage stag-1 is scheduled. """
+    return heuristic(prec[taskidx][stag] - prec[taskidx][stag-1], prio[taskidx], time[taskidx][stag] - time[taskidx][stag-1])
+
+def heuristic(precision, priority, time):
+    """ Returns a heuristic for how the 'goodness' of a potential stage. """
+    if time <= 0:
+        # a stage that takes no time is always worth adding
+        return POS_INF
+    return precision * priority / time
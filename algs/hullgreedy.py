@@ -0,0 +1,143 @@
+"""
+Convex hull greedy algorithm for the single processor, indepedent tasks model.
+Assumes same deadline for all tasks.
+
+Precision need not grow concavely with time: a cheap stage can be followed by a big
+jump in precision, which misleads greedy algorithms that only look at the next stage.
+So for each task we first compute the upper concave envelope (hull) of its
+(time, priority * precision) points, starting from the mandatory first stage. Along the
+hull the added reward per added time only decreases, so the time budget is then handed
+out greedily across hull segments (best ratio first, with a max-heap), as in the classic
+fractional knapsack approach. Time left over once no whole segment fits is used to run
+some tasks partway along the segment that did not fit.
+"""
+
+import numpy as np
+import math
+import heapq
+from problems import Problem
+
+POS_INF = 10**10 
+
+class HullGreedy():
+    # The maintained list of optimal depths. 
+    # That is, depth_sched[i] is the number of stages to be run for task i in the selected schedule.
+    # i.e. this is where the solution for the current optimal schedule gets stored
+    depth_sched = []
+
+    def __init__(self):
+        self.depth_sched = []
+
+    def sched(self, num_tasks, stages, time, prec, prio, dead, verbose=False):
+        """
+        Schedules the passed tasks with associated metadata
+
+        num_tasks   number of tasks
+        stages      stages[i] is number of stages for task i
+        time        time[i][l] is the expected runtime for the first l stages of task i (cumulative)
+        prec        prec[i][l] is the expected precision achieved by running the first l stages of task i
+        prio        prio[i] is the priority for task i
+        dead        dead[i] is the deadline for task i
+
+        """
+        return self.sched_problem(Problem(num_tasks, stages, time, prec, prio, dead), verbose)
+
+    def sched_problem(self, problem, verbose=False):
+        """
+        Schedules the tasks of problem (a problems.Problem), as sched does.
+        The mandatory time and the upper hull of each task come from problem.
+        """
+
+        # Check for correct inputs
+        problem.check()
+        num_tasks, stages, time, prec, prio, dead = problem.args
+
+        # intially, we need to schedule the mandatory components
+        depth_sched = [0] * num_tasks
+
+        # check how much time is needed by mandatory parts of tasks
+        mand_time = problem.mand_time
+
+        # if extra time, we keep scheduling
+        deadline = dead[0] #assume same deadline for all tasks
+        if mand_time > deadline:
+            return None
+        time_used = mand_time
+
+        # hulls[i] lists the stages of task i on its upper concave hull, starting with stage 0
+        hulls = problem.hulls
+
+        # the heap holds (-slope, task, k) for the next hull segment (from hulls[task][k-1] to hulls[task][k])
+        # of every task, so popping gives the segment adding the most reward per added time
+        heap = []
+        for i in range(num_tasks):
+            if len(hulls[i]) > 1:
+                heap.append((-segment_slope(time, prec, prio, hulls[i], i, 1), i, 1))
+        heapq.heapify(heap)
+
+        # the segments that did not fit, in the order they were given up on (best slope first)
+        unfit = []
+        while heap:
+            neg_slope, taskidx, k = heapq.heappop(heap)
+            if neg_slope >= 0:
+                # no remaining segment adds any reward
+                break
+            stag = hulls[taskidx][k]
+            new_time_added = time[taskidx][stag] - time[taskidx][depth_sched[taskidx]]
+            if time_used + new_time_added > deadline:
+                # this segment doesn't fit, and the later (worse) segments of this task need it
+                unfit.append((taskidx, stag))
+                continue
+            # run this task up to the end of the segment and offer up its next segment
+            depth_sched[taskidx] = stag
+            time_used += new_time_added
+            if k + 1 < len(hulls[taskidx]):
+                heapq.heappush(heap, (-segment_slope(time, prec, prio, hulls[taskidx], taskidx, k + 1), taskidx, k + 1))
+
+        # use the time left over to run tasks partway along the segments that did not fit
+        for taskidx, stag in unfit:
+            for l in range(stag - 1, depth_sched[taskidx], -1):
+                new_time_added = time[taskidx][l] - time[taskidx][depth_sched[taskidx]]
+                if time_used + new_time_added <= deadline and prec[taskidx][l] > prec[taskidx][depth_sched[taskidx]]:
+                    depth_sched[taskidx] = l
+                    time_used += new_time_added
+                    break
+
+        # Return the depth schedule (EDF is used for the server to dispatch tasks)
+        self.depth_sched = depth_sched
+        return depth_sched
+
+def upper_hull(time_i, prec_i, prio_i):
+    """
+    Returns the stages on the upper concave hull of the points (time_i[l], prio_i * prec_i[l]),
+    starting from stage 0 and keeping only the part of the hull that adds reward.
+    """
+    hull = [0]
+    for l in range(1, len(time_i)):
+        # skip stages that add no reward over the last hull stage
+        if prec_i[l] * prio_i <= prec_i[hull[-1]] * prio_i:
+            continue
+        # drop hull stages that lie on or below the line from the stage before them to stage l
+        while len(hull) >= 2:
+            a, b = hull[-2], hull[-1]
+            cross = (time_i[b] - time_i[a]) * (prec_i[l] - prec_i[a]) * prio_i - (prec_i[b] - prec_i[a]) * prio_i * (time_i[l] - time_i[a])
+            if cross >= 0:
+                hull.pop()
+            else:
+                break
+        # a stage that takes no more time than the last hull stage (but adds reward) replaces it
+        if len(hull) >= 2 and time_i[l] <= time_i[hull[-1]]:
+            hull.pop()
+        hull.append(l)
+    return hull
+
+def segment_slope(time, prec, prio, hull, taskidx, k):
+    """ Returns the added reward per added time along hull segment k of task taskidx. """
+    return heuristic(prec[taskidx][hull[k]] - prec[taskidx][hull[k-1]], prio[taskidx], time[taskidx][hull[k]] - time[taskidx][hull[k-1]])
+
+def heuristic(precision, priority, time):
+    """ Returns a heuristic for how the 'goodness' of a potential stage. """
+    if time <= 0:
+        # a stage that takes no time is always worth adding
+        return POS_INF
+    return precision * priority / time
@@ -0,0 +1,42 @@
+"""
+This script compares the convex hull greedy algorithm with the other greedy
+algorithms and with the dynamic programming algorithm, for both schedule
+quality and time spent scheduling.
+"""
+
+from diffsimulate import diffsimulate, plot_improvements, plot_times
+from numpy import random as rand
+from dynamic import Dynamic
+from greedy import Greedy 
+from newgreedy import NewGreedy
+from hullgreedy import HullGreedy
+
+
+
+# Set the seed for the pseudonrandom number generator used for the simulations
+rand.seed(3141592)
+
+# Run simulations
+num_trials = 1000
+prio_dist = 'uniform'
+algs = [Dynamic(.01), HullGreedy(), NewGreedy(), Greedy()]
+alg_names = ['Dynamic (.01)', 'Hull Greedy', 'New Greedy', 'Simple Greedy']
+num_tasks_list, results, avg_results, elapsed = diffsimulate(num_trials, algs, prio_dist=prio_dist, num_tasks=(2,30))
+print(elapsed)
+
+# Average of each metric over all trials, next to the average time per scheduling problem
+for alg_idx, alg_name in enumerate(alg_names):
+    print('{:<15} C_sum {:.4f}  C_max {:.4f}  time {:.6f}'.format(alg_name,
+        sum(results[alg_idx][0]) / len(results[alg_idx][0]),
+        sum(results[alg_idx][1]) / len(results[alg_idx][1]),
+        elapsed[alg_idx] / len(num_tasks_list)))
+
+metric_name = '($C_{sum}$)'
+metric_idx = 0 # weighted sum of precs
+plot_improvements(num_tasks_list, avg_results, alg_names, metric_idx, metric_name)
+metric_name = '($C_{max}$)'
+metric_idx = 1 # max priority
+plot_improvements(num_tasks_list, avg_results, alg_names, metric_idx, metric_name)
+
+# Plot average time spent by each algorithm
+plot_times(num_tasks_list, elapsed, alg_names, num_trials)
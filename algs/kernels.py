@@ -0,0 +1,245 @@
+"""
+Compiled inner loops for the scheduling algorithms, using numba when it is installed.
+
+Each kernel works on flat numpy arrays (float64 times, precisions and priorities, int64 stage
+counts and quantized rewards) instead of lists of lists, and reproduces the loop of the
+algorithm it replaces exactly, so the schedules are identical with or without numba.
+When numba is missing HAVE_NUMBA is False and the algorithms keep running their own
+(pure Python / numpy) loops instead of these kernels.
+
+Divisions follow numpy semantics (error_model='numpy'), as the algorithms get their
+inputs as numpy arrays in the simulations: dividing by zero gives inf or nan rather
+than raising ZeroDivisionError.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        # Without numba the kernels stay plain Python functions
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda f: f
+
+
+def pad_rows(rows, stages):
+    """
+    Packs the per-task lists rows[i] (of length stages[i]) into one float64 array
+    of shape (num_tasks, max(stages)), padded with zeros.
+    """
+    num_tasks = len(rows)
+    L = max(stages) if num_tasks > 0 else 0
+    out = np.zeros((num_tasks, L), dtype=np.float64)
+    for i in range(num_tasks):
+        out[i, :stages[i]] = rows[i]
+    return out
+
+
+@njit(cache=True)
+def table_row(P_prev, time_i, R_i, dead_i, S_row, P_row):
+    """
+    Computes the next rows of S and P (see Dynamic.next_table_row) into S_row and P_row.
+
+    P_prev      float64 array, the previous row of P
+    time_i      float64 array, time_i[l] is the runtime for the first l stages of this task (cumulative)
+    R_i         int64 array, R_i[l] is the quantized reward for the first l stages of this task
+    dead_i      the deadline for this task
+    S_row       integer array of the same length as P_prev, filled with the depths (-1 if unachievable)
+    P_row       float64 array of the same length as P_prev, filled with the times (inf if unachievable)
+    """
+    W = P_prev.shape[0]
+    for r in range(W):
+        P_row[r] = np.inf
+        S_row[r] = -1
+    # Depths are visited in increasing order and only strictly better times win,
+    # so ties resolve to the shallowest depth
+    for l in range(time_i.shape[0]):
+        shift = R_i[l]
+        t = time_i[l]
+        for r in range(shift, W):
+            candidate_t = P_prev[r - shift] + t
+            if candidate_t < P_row[r]:
+                P_row[r] = candidate_t
+                S_row[r] = l
+    # Keep only the cells whose time abides by this task's deadline
+    for r in range(W):
+        if not P_row[r] <= dead_i:
+            S_row[r] = -1
+            P_row[r] = np.inf
+
+
+@njit(cache=True)
+def slack_apply(t, d, n, p, value):
+    t[p] += value
+    if p < n:
+        d[p] += value
+
+
+@njit(cache=True)
+def slack_fits(t, d, i, value):
+    """
+    SlackTree.fits on the arrays t and d of a SlackTree (d is empty for a monotone SlackTree).
+    """
+    if d.shape[0] == 0:
+        return value <= t[0]
+    if value <= t[1]:
+        return True
+    if value > t[0]:
+        return False
+    n = d.shape[0]
+    h = 0
+    while (n >> h) > 0:
+        h += 1
+    l = i + n
+    r = 2 * n
+    for p in (l, r - 1):
+        for s in range(h, 0, -1):
+            k = p >> s
+            if k > 0 and d[k] != 0:
+                slack_apply(t, d, n, 2*k, d[k])
+                slack_apply(t, d, n, 2*k+1, d[k])
+                d[k] = 0
+    res = np.inf
+    while l < r:
+        if l & 1:
+            res = min(res, t[l])
+            l += 1
+        if r & 1:
+            r -= 1
+            res = min(res, t[r])
+        l >>= 1
+        r >>= 1
+    return value <= res
+
+
+@njit(cache=True)
+def slack_add_time(t, d, i, value):
+    """
+    SlackTree.add_time on the arrays t and d of a SlackTree (d is empty for a monotone SlackTree).
+    """
+    n = d.shape[0]
+    t[0] -= value
+    if n == 0:
+        return
+    l = i + n
+    r = 2 * n
+    l0 = l
+    r0 = r
+    while l < r:
+        if l & 1:
+            slack_apply(t, d, n, l, -value)
+            l += 1
+        if r & 1:
+            r -= 1
+            slack_apply(t, d, n, r, -value)
+        l >>= 1
+        r >>= 1
+    for p in (l0, r0 - 1):
+        while p > 1:
+            p >>= 1
+            t[p] = min(t[2*p], t[2*p+1]) + d[p]
+
+
+@njit(cache=True, error_model='numpy')
+def greedy_prime_sweep(stages, time, prec, prio, order, slack_t, slack_d, depth_sched):
+    """
+    The sweep loop of GreedyPrime.sched, filling in depth_sched (which starts as all zeros).
+
+    stages      int64 array, stages[i] is number of stages for task i
+    time        float64 array, time[i][l] is the runtime for the first l stages of task i (cumulative)
+    prec        float64 array, prec[i][l] is the precision achieved by running the first l stages of task i
+    prio        float64 array, prio[i] is the priority for task i
+    order       the tasks by decreasing priority
+    slack_t     float64 array, the t array of the SlackTree of the mandatory parts
+    slack_d     float64 array, the d array of that SlackTree
+    depth_sched int64 array, the depth schedule
+    """
+    num_tasks = stages.shape[0]
+    idx = 0
+    taskidx = order[idx]
+    nextheur = 0.0
+    left = 0
+    no_more = 0
+    while True:
+        stag = depth_sched[taskidx] + 1
+        if stag >= stages[taskidx]:
+            left += 1
+            if left >= num_tasks:
+                break
+            no_more += 1
+            idx = left
+            taskidx = order[idx]
+            continue
+        if not slack_fits(slack_t, slack_d, taskidx, time[taskidx, stag] - time[taskidx, stag-1]):
+            no_more += 1
+            if no_more >= num_tasks:
+                break
+            if idx == left:
+                left += 1
+                if left >= num_tasks:
+                    break
+                idx = left
+            else:
+                idx += 1
+            if idx >= num_tasks:
+                idx = left
+            taskidx = order[idx]
+            continue
+        curheur = (prec[taskidx, stag] - prec[taskidx, stag-1]) * prio[taskidx] / (time[taskidx, stag] - time[taskidx, stag-1])
+        if curheur >= nextheur or idx == left:
+            depth_sched[taskidx] = stag
+            slack_add_time(slack_t, slack_d, taskidx, time[taskidx, stag] - time[taskidx, stag-1])
+            if idx == left:
+                if stag + 1 >= stages[taskidx]:
+                    left += 1
+                    idx = left
+                    if idx >= num_tasks:
+                        break
+                    taskidx = order[left]
+                    continue
+                # (the time difference here is zero, as in GreedyPrime.sched)
+                nextheur = (prec[taskidx, stag+1] - prec[taskidx, stag]) * prio[taskidx] / (time[taskidx, stag+1] - time[taskidx, stag+1])
+            idx += 1
+            if idx >= num_tasks:
+                idx = left
+            taskidx = order[idx]
+        else:
+            idx = left
+            taskidx = order[idx]
+
+
+@njit(cache=True, error_model='numpy')
+def greedy_kyle_sweep(stages, time, prec, prio, order, slack_t, slack_d, depth_sched):
+    """
+    The sweep loop of GreedyKyle.sched, filling in depth_sched (which starts as all zeros).
+    The arguments are as for greedy_prime_sweep.
+    """
+    num_tasks = stages.shape[0]
+    idx = 0
+    leftheur = 0.0
+    left = 0
+    while left < num_tasks:
+        if idx >= num_tasks:
+            idx = left
+        taskidx = order[idx]
+        depth = depth_sched[taskidx]
+        if idx == left and (depth + 1 >= stages[taskidx] or not slack_fits(slack_t, slack_d, taskidx, time[taskidx, depth+1])):
+            left += 1
+            idx = left
+        elif idx == left:
+            leftheur = (prec[taskidx, depth+1] - prec[taskidx, depth]) * prio[taskidx] / (time[taskidx, depth+1] - time[taskidx, depth])
+            slack_add_time(slack_t, slack_d, taskidx, time[taskidx, depth+1] - time[taskidx, depth])
+            depth_sched[taskidx] += 1
+            idx += 1
+        else:
+            if depth + 1 < stages[taskidx] and slack_fits(slack_t, slack_d, taskidx, time[taskidx, depth+1]):
+                curheur = (prec[taskidx, depth+1] - prec[taskidx, depth]) * prio[taskidx] / (time[taskidx, depth+1] - time[taskidx, depth])
+                if curheur > leftheur:
+                    slack_add_time(slack_t, slack_d, taskidx, time[taskidx, depth+1] - time[taskidx, depth])
+                    depth_sched[taskidx] += 1
+            idx += 1
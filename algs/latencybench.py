@@ -0,0 +1,317 @@
+"""
+This script benchmarks how the sched latency of every scheduling algorithm scales with
+the size of the problem, and stores the results as json so that they can be compared
+between commits.
+
+The simulations only report the total time each algorithm spent (see plot_times in
+simulate.py) on small problems (2 to 30 tasks), which hides algorithms that blow up on
+larger ones. Here each algorithm is run on problems generated the way the simulations
+generate them while sweeping
+    - the number of tasks (2 to 10000, with 6 stages per task),
+    - the number of stages per task (with 50 tasks), and
+    - delta (for the algorithms that take one, with 50 tasks of 6 stages).
+For every point the median and 99th percentile latency of sched over several runs and
+the peak memory allocated during one run (traced with tracemalloc) are reported, and a
+complexity exponent k (latency ~ x^k) is fitted to each sweep.
+
+An algorithm stops sweeping further once its latency is expected to go over max_seconds
+per run, so slow algorithms (Yao on 10000 tasks, say) are skipped rather than run for hours.
+
+Usage:
+    python latencybench.py --out bench.json                 run the benchmarks
+    python latencybench.py --quick --algs Greedy NewGreedy  a smaller sweep of some algorithms
+    python latencybench.py --compare old.json new.json      report latency regressions
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time as systime
+import tracemalloc
+import numpy as np
+
+from problems import gen_problems, get_problem
+from yao import Yao
+from dynamic import Dynamic
+from greedy import Greedy
+from greedyprime import GreedyPrime
+from greedyKyle import GreedyKyle
+from newgreedy import NewGreedy
+from greedylookahead import GreedyLookAhead
+from heapgreedy import HeapGreedy
+from hullgreedy import HullGreedy
+from branchandbound import BranchAndBound
+from anytime import Anytime
+from kernels import HAVE_NUMBA
+
+# The algorithms benchmarked, by name: make(delta, max_seconds) returns a fresh instance and
+# takes_delta says whether the delta sweep applies. The exact search is given a time limit
+# (its latency is exponential in the worst case) and Anytime runs to its budget by design.
+ALGS = {
+    'Yao':              {'make': lambda delta, max_seconds: Yao(),                  'takes_delta': False},
+    'Dynamic':          {'make': lambda delta, max_seconds: Dynamic(delta),         'takes_delta': True},
+    'Greedy':           {'make': lambda delta, max_seconds: Greedy(),               'takes_delta': False},
+    'GreedyPrime':      {'make': lambda delta, max_seconds: GreedyPrime(),          'takes_delta': False},
+    'GreedyKyle':       {'make': lambda delta, max_seconds: GreedyKyle(),           'takes_delta': False},
+    'NewGreedy':        {'make': lambda delta, max_seconds: NewGreedy(),            'takes_delta': False},
+    'GreedyLookAhead':  {'make': lambda delta, max_seconds: GreedyLookAhead(),      'takes_delta': False},
+    'HeapGreedy':       {'make': lambda delta, max_seconds: HeapGreedy(),           'takes_delta': False},
+    'HullGreedy':       {'make': lambda delta, max_seconds: HullGreedy(),           'takes_delta': False},
+    'BranchAndBound':   {'make': lambda delta, max_seconds: BranchAndBound(time_limit=max_seconds), 'takes_delta': False},
+    'Anytime':          {'make': lambda delta, max_seconds: Anytime(budget=.1),     'takes_delta': False},
+}
+
+# The sweeps: the values taken by the swept parameter, and the other two held fixed
+TASKS_SWEEP = [2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+STAGES_SWEEP = [2, 4, 6, 8, 12, 16, 24, 32]
+DELTA_SWEEP = [.1, .05, .02, .01, .005, .002, .001]
+FIXED_TASKS = 50
+FIXED_STAGES = 6
+FIXED_DELTA = .01
+
+# The smaller sweeps of --quick
+QUICK_TASKS_SWEEP = [2, 10, 50, 200, 1000]
+QUICK_STAGES_SWEEP = [2, 6, 16]
+QUICK_DELTA_SWEEP = [.1, .01, .001]
+
+# Runs per point: up to MAX_REPEATS, but at least MIN_REPEATS and no more than fit in POINT_SECONDS
+MIN_REPEATS = 3
+MAX_REPEATS = 25
+POINT_SECONDS = 2.0
+
+# --compare flags a point whose median latency grew by more than this factor (and by more than
+# MIN_REGRESSION_SECONDS, as timer noise alone makes the fastest points swing by more than that factor)
+REGRESSION_RATIO = 1.25
+MIN_REGRESSION_SECONDS = 1e-4
+
+
+def time_sched(make, problem):
+    """
+    Runs a fresh algorithm from make() on problem, returning the seconds spent in sched.
+    """
+    alg = make()
+    start = systime.perf_counter()
+    alg.sched(*problem)
+    return systime.perf_counter() - start
+
+def peak_memory(make, problem):
+    """
+    Runs a fresh algorithm from make() on problem, returning the peak memory (MB) allocated by sched.
+    """
+    alg = make()
+    tracemalloc.start()
+    try:
+        alg.sched(*problem)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return peak / 2**20
+
+def bench_point(make, problem):
+    """
+    Times sched on problem and returns the stats for this point of a sweep.
+    """
+    # One untimed run first, so that imports, numba compilation and caches are not counted
+    first = time_sched(make, problem)
+    elapsed = []
+    spent = first
+    while len(elapsed) < MAX_REPEATS and (len(elapsed) < MIN_REPEATS or spent < POINT_SECONDS):
+        elapsed.append(time_sched(make, problem))
+        spent += elapsed[-1]
+    return {
+        'repeats': len(elapsed),
+        'median': float(np.median(elapsed)),
+        'p99': float(np.percentile(elapsed, 99)),
+        'mean': float(np.mean(elapsed)),
+        'peak_mb': peak_memory(make, problem),
+    }
+
+def fit_exponent(xs, ys):
+    """
+    Fits latency ~ x^k to the points (xs[j], ys[j]) and returns k (None for fewer than two points).
+
+    Only the upper half of the points (by x) is used, as the small problems are dominated
+    by the constant overhead of sched rather than by its growth.
+    """
+    points = sorted((x, y) for x, y in zip(xs, ys) if x > 0 and y > 0)
+    points = points[(len(points) - 1) // 2:]
+    if len(points) < 2 or points[0][0] == points[-1][0]:
+        return None
+    logx = np.log([x for x, y in points])
+    logy = np.log([y for x, y in points])
+    return float(np.polyfit(logx, logy, 1)[0])
+
+def sweep(name, param, values, max_seconds, verbose=True):
+    """
+    Benchmarks algorithm name over values of param ('num_tasks', 'num_stages' or 'delta'),
+    with the other parameters held at their FIXED_ values.
+
+    Returns the list of results for the points run, and the list of values skipped because
+    they were expected to take more than max_seconds per run.
+    """
+    results, skipped = [], []
+    last = None
+    for value in values:
+        point = {'num_tasks': FIXED_TASKS, 'num_stages': FIXED_STAGES, 'delta': FIXED_DELTA}
+        point[param] = value
+        # The cost grows with the number of tasks and stages and with 1/delta
+        x = 1 / value if param == 'delta' else value
+
+        # Skip the rest of the sweep once the next point is expected to be too slow, extrapolating
+        # from the last two points (and at least linearly)
+        if last is not None:
+            growth = 1
+            if len(results) >= 2:
+                growth = max(1, fit_exponent([r['x'] for r in results[-2:]], [r['median'] for r in results[-2:]]) or 1)
+            if last['median'] > max_seconds or last['median'] * (x / last['x']) ** growth > max_seconds:
+                skipped.append(value)
+                continue
+
+        # Every point gets the same seed, so the problems of a sweep only differ in the swept parameter
+        batch = gen_problems([point['num_tasks']], num_stages=point['num_stages'], gen=np.random.RandomState(0))
+        problem = get_problem(0, *batch[:5])
+        make = lambda: ALGS[name]['make'](point['delta'], max_seconds)
+        result = dict(alg=name, sweep=param, x=x, **point)
+        result.update(bench_point(make, problem))
+        results.append(result)
+        last = result
+        if verbose:
+            print('{:<16} {:<10} {:>8} {:>6} {:>7} {:>12.6f} {:>12.6f} {:>10.2f}'.format(
+                name, param, point['num_tasks'], point['num_stages'], point['delta'],
+                result['median'], result['p99'], result['peak_mb']))
+            sys.stdout.flush()
+    return results, skipped
+
+def git_commit():
+    """
+    Returns the commit of the checkout this runs from (None outside of git).
+    """
+    try:
+        out = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(alg_names=None, quick=False, max_seconds=1.0, verbose=True):
+    """
+    Runs the benchmarks for alg_names (all of ALGS by default) and returns them as a dictionary
+    ready to be dumped as json, with
+        meta        the commit, machine and library versions the benchmarks ran with
+        results     one entry per point run (alg, sweep, num_tasks, num_stages, delta, repeats,
+                        median, p99, mean in seconds and peak_mb)
+        exponents   exponents[alg][sweep] is the fitted complexity exponent of that sweep
+        skipped     skipped[alg][sweep] lists the values skipped as too slow
+    """
+    if alg_names is None:
+        alg_names = list(ALGS)
+    for name in alg_names:
+        if name not in ALGS:
+            raise ValueError("unknown algorithm {} (expected one of {})".format(name, ', '.join(ALGS)))
+
+    sweeps = [
+        ('num_tasks', QUICK_TASKS_SWEEP if quick else TASKS_SWEEP),
+        ('num_stages', QUICK_STAGES_SWEEP if quick else STAGES_SWEEP),
+        ('delta', QUICK_DELTA_SWEEP if quick else DELTA_SWEEP),
+    ]
+
+    if verbose:
+        print('{:<16} {:<10} {:>8} {:>6} {:>7} {:>12} {:>12} {:>10}'.format(
+            'alg', 'sweep', 'tasks', 'stages', 'delta', 'median (s)', 'p99 (s)', 'peak (MB)'))
+    results, exponents, skipped = [], {}, {}
+    for name in alg_names:
+        exponents[name], skipped[name] = {}, {}
+        for param, values in sweeps:
+            if param == 'delta' and not ALGS[name]['takes_delta']:
+                continue
+            points, skipped[name][param] = sweep(name, param, values, max_seconds, verbose)
+            exponents[name][param] = fit_exponent([r['x'] for r in points], [r['median'] for r in points])
+            results.extend(points)
+
+    meta = {
+        'commit': git_commit(),
+        'date': systime.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': platform.platform(),
+        'processor': platform.processor(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'numba': HAVE_NUMBA,
+        'quick': quick,
+        'max_seconds': max_seconds,
+    }
+    return {'meta': meta, 'results': results, 'exponents': exponents, 'skipped': skipped}
+
+def print_exponents(bench):
+    """
+    Prints the fitted complexity exponents of a benchmark run.
+    """
+    print('\nfitted exponents (latency ~ x^k, x being num_tasks, num_stages or 1/delta)')
+    print('{:<16} {:>10} {:>10} {:>10}'.format('alg', 'num_tasks', 'num_stages', 'delta'))
+    fmt = lambda k: '{:>10.2f}'.format(k) if k is not None else '{:>10}'.format('-')
+    for name, exps in bench['exponents'].items():
+        print('{:<16} {} {} {}'.format(name, *(fmt(exps.get(param)) for param in ('num_tasks', 'num_stages', 'delta'))))
+
+def compare(old, new, ratio=REGRESSION_RATIO, verbose=True):
+    """
+    Compares two benchmark runs (as returned by run or loaded from their json) and returns
+    the list of regressions: the points whose median latency in new is more than ratio times
+    (and MIN_REGRESSION_SECONDS more than) that in old, as (alg, sweep, num_tasks, num_stages, delta, old median, new median).
+    """
+    key = lambda r: (r['alg'], r['sweep'], r['num_tasks'], r['num_stages'], r['delta'])
+    old_points = {key(r): r for r in old['results']}
+    regressions = []
+    if verbose:
+        print('{:<16} {:<10} {:>8} {:>6} {:>7} {:>12} {:>12} {:>8}'.format(
+            'alg', 'sweep', 'tasks', 'stages', 'delta', 'old (s)', 'new (s)', 'ratio'))
+    for r in new['results']:
+        if key(r) not in old_points:
+            continue
+        before = old_points[key(r)]['median']
+        change = r['median'] / before if before > 0 else math.inf
+        regressed = change > ratio and r['median'] - before > MIN_REGRESSION_SECONDS
+        if regressed:
+            regressions.append(key(r) + (before, r['median']))
+        if verbose:
+            print('{:<16} {:<10} {:>8} {:>6} {:>7} {:>12.6f} {:>12.6f} {:>8.2f}{}'.format(
+                *key(r), before, r['median'], change, '  REGRESSION' if regressed else ''))
+    if verbose:
+        print('\n{:<16} {:<10} {:>10} {:>10}'.format('alg', 'sweep', 'old k', 'new k'))
+        for name, exps in new['exponents'].items():
+            for param, k in exps.items():
+                k_old = old['exponents'].get(name, {}).get(param)
+                if k is not None and k_old is not None:
+                    print('{:<16} {:<10} {:>10.2f} {:>10.2f}'.format(name, param, k_old, k))
+        print('\n{} of the points regressed by more than {}x'.format(len(regressions), ratio))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark how sched latency scales for every algorithm.')
+    parser.add_argument('--out', default='latencybench.json', help='json file to write the results to')
+    parser.add_argument('--algs', nargs='+', choices=list(ALGS), help='algorithms to benchmark (default all)')
+    parser.add_argument('--quick', action='store_true', help='run smaller sweeps')
+    parser.add_argument('--max-seconds', type=float, default=1.0,
+                        help='stop sweeping an algorithm once a run would take longer than this')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help='compare two result files instead of benchmarking')
+    parser.add_argument('--ratio', type=float, default=REGRESSION_RATIO,
+                        help='slowdown factor --compare reports as a regression')
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            old = json.load(f)
+        with open(args.compare[1]) as f:
+            new = json.load(f)
+        # A non-zero exit status lets scripts catch regressions
+        sys.exit(1 if compare(old, new, args.ratio) else 0)
+
+    bench = run(args.algs, args.quick, args.max_seconds)
+    print_exponents(bench)
+    with open(args.out, 'w') as f:
+        json.dump(bench, f, indent=1)
+    print('saved to', args.out)
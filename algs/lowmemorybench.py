@@ -0,0 +1,55 @@
+"""
+This script compares the peak memory (RSS) and runtime of the full-table and
+low memory (divide-and-conquer) modes of the dynamic programming algorithms.
+
+Each run happens in a fresh process so that its peak RSS is not polluted by
+earlier runs.
+"""
+
+import multiprocessing
+import resource
+import time as systime
+import numpy as np
+from problems import gen_problems, get_problem
+from dynamic import Dynamic
+from yao import Yao
+
+
+def run_once(alg_name, delta, low_memory, num_tasks, results):
+    """Runs one scheduling problem and reports (elapsed, peak RSS in MB, depth_sched)."""
+    batch = gen_problems([num_tasks], gen=np.random.RandomState(0))
+    problem = get_problem(0, *batch[:5])
+    if alg_name == 'Yao':
+        alg = Yao(low_memory=low_memory)
+    else:
+        alg = Dynamic(delta, low_memory=low_memory)
+    start = systime.time()
+    depth_sched = alg.sched(*problem)
+    elapsed = systime.time() - start
+    # ru_maxrss is reported in kilobytes on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    results.put((elapsed, peak_rss, depth_sched))
+
+def bench(alg_name, delta, low_memory, num_tasks):
+    results = multiprocessing.Queue()
+    proc = multiprocessing.Process(target=run_once, args=(alg_name, delta, low_memory, num_tasks, results))
+    proc.start()
+    result = results.get()
+    proc.join()
+    return result
+
+
+if __name__ == '__main__':
+    delta = .001
+    num_tasks_list = [25, 50, 100, 200]
+    print('{:<8} {:>6} {:>6} {:>12} {:>12} {:>14} {:>16}'.format(
+        'alg', 'delta', 'tasks', 'full (s)', 'low mem (s)', 'full RSS (MB)', 'low mem RSS (MB)'))
+    for alg_name in ['Dynamic', 'Yao']:
+        alg_delta = delta if alg_name == 'Dynamic' else .01
+        for num_tasks in num_tasks_list:
+            full_elapsed, full_rss, full_sched = bench(alg_name, alg_delta, False, num_tasks)
+            low_elapsed, low_rss, low_sched = bench(alg_name, alg_delta, True, num_tasks)
+            if full_sched != low_sched:
+                print('Schedules differ for', alg_name, 'with', num_tasks, 'tasks')
+            print('{:<8} {:>6} {:>6} {:>12.3f} {:>12.3f} {:>14.1f} {:>16.1f}'.format(
+                alg_name, alg_delta, num_tasks, full_elapsed, low_elapsed, full_rss, low_rss))
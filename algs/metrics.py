@@ -5,71 +5,196 @@ These metrics give various ways to answer the question: how "good" is this sched
 
 import numpy as np
 
+# Reason codes returned by validate_sched and batch_validate
+VALID = 0
+MISSING_SCHED = 1       # the algorithm returned no schedule (None)
+NEGATIVE_DEPTH = 2      # some task does not run its mandatory part
+DEPTH_TOO_LARGE = 3     # some task is scheduled past its last stage
+DEADLINE_OVERRUN = 4    # some task finishes after its deadline
+REASON_NAMES = ['valid', 'missing schedule', 'negative depth', 'depth too large', 'deadline overrun']
+
+def validate_sched(depth_sched, num_tasks, stages, time, prec, prio, dead):
+    """
+    Checks whether the schedule implied by depth_sched is a valid schedule, meaning
+    that all tasks run their mandatory part and finish execution before their deadline.
+
+    Returns reason, task_idx where reason is one of the reason codes above (VALID for a valid schedule)
+    and task_idx is the first offending task (-1 when there is none).
+    """
+    if depth_sched is None:
+        return MISSING_SCHED, -1
+    for i in range(num_tasks):
+        if depth_sched[i] < 0:
+            return NEGATIVE_DEPTH, i
+    for i in range(num_tasks):
+        if depth_sched[i] >= stages[i]:
+            return DEPTH_TOO_LARGE, i
+    cum_time = 0
+    for i in range(num_tasks):
+        cum_time += time[i][depth_sched[i]]
+        if cum_time > dead[i]:
+            return DEADLINE_OVERRUN, i
+    return VALID, -1
+
 def is_valid_sched(depth_sched, num_tasks, stages, time, prec, prio, dead):
     """
     Confirms that the schedule implied by depth_sched is a valid schedule, meaning
     that all tasks finish execution before their deadline.
+    (See validate_sched for why a schedule is invalid.)
     """
-    #TODO implement checks on valid inputs (assumes correct right now)
+    reason, task_idx = validate_sched(depth_sched, num_tasks, stages, time, prec, prio, dead)
+    return reason == VALID
 
-    cum_time = 0
+def batch_validate(depth_scheds, stages, time, dead, missing=None):
+    """
+    Vectorized validate_sched for many depth schedules at once.
+
+    Arguments are as for batch_metrics.
+
+    Returns reasons, task_idxs each of shape (..., T): the reason code of each schedule and
+    its first offending task (-1 when there is none).
+    """
+    depth_scheds = np.asarray(depth_scheds)
+    stages = np.asarray(stages)
+    time = np.asarray(time, dtype=np.float64)
+    dead = np.asarray(dead, dtype=np.float64)
+    task_mask = stages > 0
+    reasons = np.full(depth_scheds.shape[:-1], VALID)
+    task_idxs = np.full(depth_scheds.shape[:-1], -1)
+
+    # Look up the (cumulative) time of each task at its scheduled depth
+    depth = np.clip(depth_scheds, 0, time.shape[-1] - 1)[..., None]
+    sched_time = np.take_along_axis(np.broadcast_to(time, depth.shape[:-1] + time.shape[-1:]), depth, axis=-1)[..., 0]
+    cum_time = np.cumsum(np.where(task_mask, sched_time, 0), axis=-1)
+
+    # Checked from the least to the most important, so that the most important reason is the one kept
+    checks = [(DEADLINE_OVERRUN, (cum_time > dead) & task_mask),
+              (DEPTH_TOO_LARGE, (depth_scheds >= stages) & task_mask),
+              (NEGATIVE_DEPTH, (depth_scheds < 0) & task_mask)]
+    for reason, offending in checks:
+        failed = np.any(offending, axis=-1)
+        reasons[failed] = reason
+        task_idxs[failed] = np.argmax(offending, axis=-1)[failed]
+    if missing is not None:
+        reasons[missing] = MISSING_SCHED
+        task_idxs[missing] = -1
+    return reasons, task_idxs
+
+def count_failures(reasons):
+    """
+    Counts the schedules with each reason code.
+
+    reasons     (A, ...) array of reason codes, eg one block per algorithm as from batch_validate
+
+    Returns an (A, number of reason codes) array of counts.
+    """
+    reasons = np.asarray(reasons).reshape(len(reasons), -1)
+    return np.stack([np.count_nonzero(reasons == code, axis=-1) for code in range(len(REASON_NAMES))], axis=-1)
+
+def print_failure_summary(counts, alg_names):
+    """
+    Prints a compact table of the number of invalid schedules by reason for each algorithm
+    (the counts from count_failures), or nothing if every schedule was valid.
+    """
+    counts = np.asarray(counts)
+    if not np.any(counts[:, VALID+1:]):
+        return
+    width = max(len(name) for name in alg_names)
+    print('Invalid schedules:')
+    print(' '*width + ''.join(' {:>17}'.format(name) for name in REASON_NAMES[VALID+1:]))
+    for name, row in zip(alg_names, counts):
+        print(name.ljust(width) + ''.join(' {:>17}'.format(count) for count in row[VALID+1:]))
+
+def batch_metrics(depth_scheds, stages, time, prec, prio, dead, missing=None):
+    """
+    Validates and scores many depth schedules (for many trials and algorithms) in one vectorized pass.
+
+    Arguments, for T trials of at most N tasks with at most L stages (padded as by problems.gen_problems):
+        depth_scheds    (..., T, N) int array of depth schedules, eg one (T, N) block per algorithm
+        stages          (T, N) int array, stages[t][i] is the number of stages for task i (0 for padding)
+        time            (T, N, L) array, time[t][i][l] is the runtime for the first l stages of task i (cumulative)
+        prec            (T, N, L) array, prec[t][i][l] is the expected precision for the first l stages of task i
+        prio            (T, N) array, prio[t][i] is the priority for task i
+        dead            (T, N) array, dead[t][i] is the deadline for task i
+        missing         optional (..., T) bool array, True where the algorithm returned no schedule
+
+    Returns reasons, weighted_avgs, max_prios, each of shape (..., T):
+        reasons         the reason code of each schedule (see batch_validate), VALID for a valid schedule
+        weighted_avgs   the sum of reward over all tasks (see weighted_avg_metric), -1 for invalid schedules
+        max_prios       the precision achieved by the maximum priority task (see max_priority_metric),
+                            0 for invalid schedules
+    """
+    depth_scheds = np.asarray(depth_scheds)
+    stages = np.asarray(stages)
+    prec = np.asarray(prec, dtype=np.float64)
+    prio = np.asarray(prio, dtype=np.float64)
+    task_mask = stages > 0
+
+    reasons, task_idxs = batch_validate(depth_scheds, stages, time, dead, missing)
+    valid = reasons == VALID
+
+    # Look up the precision of each task at its scheduled depth
+    depth = np.clip(depth_scheds, 0, prec.shape[-1] - 1)[..., None]
+    sched_prec = np.take_along_axis(np.broadcast_to(prec, depth.shape[:-1] + prec.shape[-1:]), depth, axis=-1)[..., 0]
+    sched_prec = np.where(task_mask, sched_prec, 0)
+
+    # Each prec and prio of a scored task should be in [0,1) (see reward)
+    scored = task_mask & valid[..., None]
+    if np.any(scored & ((sched_prec < 0) | (sched_prec >= 1))):
+        raise ValueError("precisions should have: 0 <= p < 1")
+    if np.any(scored & ((prio < 0) | (prio > 1))):
+        raise ValueError("priorities should have: 0 <= p <= 1")
+
+    weighted_avgs = np.where(valid, np.sum(sched_prec * prio, axis=-1), -1)
+
+    # The (first) maximum priority task of each trial
+    max_prio_task = np.argmax(np.where(task_mask, prio, -np.inf), axis=-1)
+    max_prio_prec = np.take_along_axis(sched_prec, np.broadcast_to(max_prio_task, sched_prec.shape[:-1])[..., None], axis=-1)[..., 0]
+    max_prios = np.where(valid, max_prio_prec, 0)
+
+    return reasons, weighted_avgs, max_prios
+
+def stack_sched(depth_sched, num_tasks, stages, time, prec, prio, dead):
+    """
+    Pads a single depth schedule and its scheduling problem (as passed to sched) into
+    the arrays taken by batch_metrics, as a batch of one trial.
+    """
+    L = max(stages) if num_tasks > 0 else 1
+    stacked_stages = np.array([list(stages)])
+    stacked_time = np.zeros((1, num_tasks, L))
+    stacked_prec = np.zeros((1, num_tasks, L))
     for i in range(num_tasks):
-        cum_time += time[i][depth_sched[i]]
-        if cum_time > dead[i]:
-            print('Invalid depth schedule: must have total runtime at most the deadline')
-            return False
-    for i in range(len(depth_sched)):
-        if depth_sched[i] < 0:
-            print('Invalid depth schedule: must run the mandatory part of task',i)
-            return False
-    return True
+        stacked_time[0][i][:stages[i]] = time[i]
+        stacked_prec[0][i][:stages[i]] = prec[i]
+    missing = np.array([depth_sched is None])
+    if depth_sched is None:
+        depth_sched = [-1] * num_tasks
+    return np.array([depth_sched]), stacked_stages, stacked_time, stacked_prec, np.array([prio]), np.array([dead]), missing
 
 def weighted_avg_metric(depth_sched, num_tasks, stages, time, prec, prio, dead):
     """
     Returns the sum of reward for all tasks under the given schedule, where
     reward is given by the function reward below.
     """
-    # If the passed schedule is invalid, return 0.
-    if not is_valid_sched(depth_sched, num_tasks, stages, time, prec, prio, dead):
-        return -1
-
-    cum_reward = 0
-    for i in range(num_tasks):
-        curprec = prec[i][depth_sched[i]]
-        curprio = prio[i]
-        cum_reward += reward(curprec, curprio)
-    
-    return cum_reward
+    # If the passed schedule is invalid, return -1.
+    reasons, weighted_avgs, max_prios = batch_metrics(*stack_sched(depth_sched, num_tasks, stages, time, prec, prio, dead))
+    return weighted_avgs[0]
 
 def max_priority_metric(depth_sched, num_tasks, stages, time, prec, prio, dead):
     """
     Returns the precision achieved by the maximum priority task for this schedule.
     """
     # If the passed schedule is invalid, return 0.
-    if not is_valid_sched(depth_sched, num_tasks, stages, time, prec, prio, dead):
-        return 0
-
-    #max_prio_task = np.argmax(prio)
-    prio = np.array(prio)
-    highest_prio_tasks = np.argsort(-1*prio)
-    max_prio_task = highest_prio_tasks[0]
-    return prec[max_prio_task][depth_sched[max_prio_task]]
+    reasons, weighted_avgs, max_prios = batch_metrics(*stack_sched(depth_sched, num_tasks, stages, time, prec, prio, dead))
+    return max_prios[0]
 
 def simple_precision_metric(depth_sched, num_tasks, stages, time, prec, prio, dead):
     """
     Returns the precision achieved by the maximum priority task for this schedule.
     """
     # If the passed schedule is invalid, return 0.
-    if not is_valid_sched(depth_sched, num_tasks, stages, time, prec, prio, dead):
-        return 0
-
-    cum_reward = 0
-    for i in range(num_tasks):
-        curprec = prec[i][depth_sched[i]]
-        curprio = prio[i]
-        cum_reward += reward(curprec, curprio)
-    
-    return cum_reward
+    reasons, weighted_avgs, max_prios = batch_metrics(*stack_sched(depth_sched, num_tasks, stages, time, prec, prio, dead))
+    return weighted_avgs[0] if reasons[0] == VALID else 0
 
 def reward(prec, prio):
     """
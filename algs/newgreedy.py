@@ -1,6 +1,7 @@
 """
 Simple greedy algorithm for the single processor, indepedent tasks model.
-Assumes same deadline for all tasks.
+Tasks may have different deadlines: they run in the order given (earliest deadline first),
+and slacktree.py checks that every task still meets its deadline as stages are added.
 
 Schedules mandatory parts then simply adds optional parts in order of priority.
 """
@@ -8,6 +9,8 @@ Schedules mandatory parts then simply adds optional parts in order of priority.
 import numpy as np
 import math
 
+from problems import Problem
+
 POS_INF = 10**10 
 
 class NewGreedy():
@@ -30,45 +33,26 @@ class NewGreedy():
         prio        prio[i] is the priority for task i
         dead        dead[i] is the deadline for task i
 
+        """
+        return self.sched_problem(Problem(num_tasks, stages, time, prec, prio, dead), verbose)
+
+    def sched_problem(self, problem, verbose=False):
+        """
+        Schedules the tasks of problem (a problems.Problem), as sched does.
+        The heuristic table and the slack tree come from problem.
         """
 
         # Check for correct inputs
-        if not isinstance(num_tasks, int) or num_tasks < 0:
-            raise ValueError("num_tasks should be a positive integer")
-        if not len(stages) == num_tasks:
-            raise ValueError("stages should have length num_tasks")
-        if not len(time) == num_tasks:
-            raise ValueError("time should have length num_tasks")
-        for task_idx, time_list in enumerate(time):
-            if not len(time_list) == stages[task_idx]:
-                raise ValueError("time[i] should have length stages[i]")
-        for task_idx, prec_list in enumerate(prec):
-            if not len(prec_list) == stages[task_idx]:
-                raise ValueError("prec[i] should have length stages[i]")
-        if not len(prec) == num_tasks:
-            raise ValueError("prec should have length num_tasks")
-        if not len(prio) == num_tasks:
-            raise ValueError("prio should have length num_tasks")
-        if not len(dead) == num_tasks:
-            raise ValueError("dead should have length num_tasks")
+        problem.check()
+        num_tasks, stages, time, prec, prio, dead = problem.args
 
         # intially, we need to schedule the mandatory components
         depth_sched = [0] * num_tasks
 
-        # check how much time is needed by mandatory parts of tasks
-        mand_time = 0
-        for i in range(len(time)):
-            mand_time += time[i][0] #first stage encapsulates all mandatory work for a task
-
         # if extra time, we keep scheduling
-        deadline = dead[0] #assume same deadline for all tasks
-        if mand_time > deadline:
+        slack = problem.slack_tree()
+        if slack is None:
             return None
-        time_used = mand_time
-
-        # get the indexes of the highest priority tasks
-        prio = np.array(prio)
-        highest_prio_tasks = np.argsort(-1*prio)
 
         # simple greedy strategy at a high level:
         # 1. compute a heuristic for each possible stage based on cumulative addition/scheduling of that stage
@@ -77,14 +61,10 @@ class NewGreedy():
 
         # now these steps are implemented below
         # 1. compute a heuristic for each possible stage based on cumulative addition/scheduling of that stage
-        heur_table = [];
-        for i in range(num_tasks):
-            heur_table.append([])
-            for j in range(stages[i]):
-                heur_table[i].append(heuristic(prec[i][j], prio[i], time[i][j]))
+        # (computed once per problem, see problems.Problem.heur_table)
+        heur_table = problem.heur_table
 
-        # 2. sort all stages by this heuristic
-        heur_table = np.array(heur_table)
+        # 2. sort all stages by this heuristic (padding, as nan, sorts last)
         i = (-1*heur_table).argsort(axis=None, kind='mergesort')
         j = np.unravel_index(i, heur_table.shape)
         sortedStages = np.vstack(j).T
@@ -94,6 +74,9 @@ class NewGreedy():
         # 3. add as many stages as possible in order of this heuristic ranking
         for i in range(len(sortedStages)):
             tn,sn = sortedStages[i]
+            # skip the padding of tasks with fewer stages
+            if sn >= stages[tn]:
+                continue
             # confirm that this stage has not already been added to the depth schedule 
             # (eg if a later stage than this had already been added for this task)
             if depth_sched[tn] >= sn:
@@ -101,11 +84,11 @@ class NewGreedy():
             previous_depth = depth_sched[tn]
             new_time_added = time[tn][sn] - time[tn][previous_depth]
             # see if there is enough time remaining to schedule this stage
-            if time_used + new_time_added > deadline:
+            if not slack.fits(tn, new_time_added):
                 continue
             # now add this stage to the depth schedule
             depth_sched[tn] = sn
-            time_used += new_time_added
+            slack.add_time(tn, new_time_added)
 
         # Return the depth schedule (EDF is used for the server to dispatch tasks)
         self.depth_sched = depth_sched
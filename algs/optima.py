@@ -0,0 +1,300 @@
+"""
+Quality regression harness: scores algorithms against the exact optima of a fixed corpus
+of scheduling problems, which are solved once and cached on disk.
+
+The simulations judge the algorithms against Dynamic(.01), which is recomputed every run
+and is the slowest algorithm of the set. Here the corpus (generated from a fixed seed the
+way the simulations generate their problems) is solved exactly by the branch and bound
+algorithm once. The optimal weighted average metric of each problem is stored in a gzipped
+json cache keyed by a hash of the problem, so later runs only need to run the algorithms
+being checked and compare their metric to the cached optimum (the optimality gap).
+
+The cache is kept at OPTIMA_CACHE (or DEFAULT_PATH), and since it is keyed by the problem
+itself, any problem can be scored against it (problems not in it are solved and added).
+
+Usage:
+    python optima.py                                score every algorithm on the default corpus
+    python optima.py --algs NewGreedy --max-gap .02 exit non-zero if NewGreedy's mean gap is over 2%
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time as systime
+import numpy as np
+
+from problems import gen_problems, get_problem
+from branchandbound import BranchAndBound
+from trials import run_trials
+from metrics import batch_metrics, VALID, REASON_NAMES
+
+# Where the optima are cached (the OPTIMA_CACHE environment variable overrides this)
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'optima.json.gz')
+
+# The default corpus: CORPUS_TRIALS problems of 2 to 30 tasks for each priority distribution
+CORPUS_SEED = 0
+CORPUS_TRIALS = 200
+CORPUS_NUM_TASKS = (2, 30)
+CORPUS_PRIO_DISTS = ('uniform', 'beta', 'normal')
+
+# A schedule whose metric is within this (relative) gap of the optimum counts as optimal
+GAP_TOLERANCE = 1e-9
+
+
+def problem_hash(problem):
+    """
+    Returns a hash (hex string) of a scheduling problem (num_tasks, stages, time, prec, prio, dead),
+    which only depends on the values in the problem (not on whether they are lists or arrays).
+    """
+    num_tasks, stages, time, prec, prio, dead = problem
+    h = hashlib.sha256()
+    h.update(np.array([num_tasks] + [int(s) for s in stages], dtype=np.int64).tobytes())
+    for i in range(num_tasks):
+        h.update(np.asarray(time[i], dtype=np.float64).tobytes())
+        h.update(np.asarray(prec[i], dtype=np.float64).tobytes())
+    h.update(np.asarray(prio, dtype=np.float64).tobytes())
+    h.update(np.asarray(dead, dtype=np.float64).tobytes())
+    return h.hexdigest()
+
+
+class OptimaCache():
+
+    def __init__(self, path=None):
+        """
+        path        the gzipped json file the optima are kept in (OPTIMA_CACHE or DEFAULT_PATH by default)
+
+        Each entry maps a problem_hash to the optimal metric, the schedule achieving it,
+        the solver that found it, whether it is proven optimal and the reason code (see metrics.py)
+        of the schedule. A problem the solver found no valid schedule for (as when the mandatory
+        parts alone miss a deadline) is kept as not solved: its metric and schedule are None and
+        its reason says why.
+        """
+        self.path = path if path is not None else os.environ.get('OPTIMA_CACHE', DEFAULT_PATH)
+        self.entries = {}
+        self.dirty = False
+        try:
+            with gzip.open(self.path, 'rt') as f:
+                self.entries = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            raise ValueError("{} does not hold an optima cache".format(self.path)) from e
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """
+        Returns the entry for a problem_hash, or None if it is not cached.
+        """
+        return self.entries.get(key)
+
+    def put(self, key, metric, depth_sched, solver, optimal, reason=VALID):
+        """
+        Caches the optimum of the problem with hash key, or that it was not solved
+        if reason is not VALID (metric and depth_sched are then ignored).
+        """
+        solved = reason == VALID
+        self.entries[key] = {'metric': float(metric) if solved else None,
+                             'sched': [int(d) for d in depth_sched] if solved else None,
+                             'solver': solver, 'optimal': bool(optimal and solved), 'reason': int(reason)}
+        self.dirty = True
+
+    def save(self):
+        """
+        Writes the cache to its path, if anything was added since it was loaded.
+        """
+        if not self.dirty:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Written to a temporary file first so that an interrupted save cannot corrupt the cache
+        tmp_path = self.path + '.tmp'
+        with gzip.open(tmp_path, 'wt') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+
+class ExactSolver():
+
+    def __init__(self, max_nodes=None, time_limit=None):
+        """
+        Solves problems with BranchAndBound(max_nodes, time_limit), for run_trials.
+
+        sched_problem returns (depth_sched, optimal) instead of just depth_sched, so that whether
+        the schedule is proven optimal makes it back from the worker processes of run_trials.
+        """
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+
+    def sched_problem(self, problem, verbose=False):
+        bb = BranchAndBound(self.max_nodes, self.time_limit)
+        depth_sched = bb.sched_problem(problem, verbose)
+        return depth_sched, bb.optimal
+
+
+def gen_corpus(num_trials=CORPUS_TRIALS, seed=CORPUS_SEED, num_tasks=CORPUS_NUM_TASKS, prio_dists=CORPUS_PRIO_DISTS):
+    """
+    Generates the fixed corpus of problems: num_trials problems (with num_tasks[0] to num_tasks[1]
+    tasks) for each priority distribution, from its own generator seeded with seed (numpy's global
+    generator is left alone, so generating the corpus does not change the simulations).
+
+    Returns the batch (stages, time, prec, prio, dead, mask as from gen_problems) of all the problems.
+    """
+    gen = np.random.RandomState(seed)
+    batches = []
+    for prio_dist in prio_dists:
+        num_tasks_list = gen.randint(num_tasks[0], num_tasks[1] + 1, size=num_trials)
+        batches.append(gen_problems(num_tasks_list, prio_dist, gen=gen))
+
+    # Pad all the batches to the same number of tasks and stack them
+    N = max(batch[0].shape[1] for batch in batches)
+    padded = []
+    for batch in batches:
+        pad = N - batch[0].shape[1]
+        padded.append([np.pad(a, [(0, 0), (0, pad)] + [(0, 0)] * (a.ndim - 2)) for a in batch])
+    return tuple(np.concatenate(arrays) for arrays in zip(*padded))
+
+def solve(batch, cache, workers=1, max_nodes=None, time_limit=None, verbose=True):
+    """
+    Solves exactly (with BranchAndBound) each problem of batch whose optimum is not in cache yet,
+    adds the optima to cache and saves it. A problem with no valid schedule is cached as not solved.
+
+    With a max_nodes or time_limit (per problem) the search may stop before proving its schedule
+    optimal, in which case the schedule is still cached, but with optimal False.
+
+    Returns the problem hashes of the batch.
+    """
+    stages, time, prec, prio, dead, mask = batch
+    problems = [get_problem(t, stages, time, prec, prio, dead) for t in range(len(stages))]
+    keys = [problem_hash(problem) for problem in problems]
+    todo = [t for t, key in enumerate(keys) if key not in cache]
+    if not todo:
+        return keys
+
+    if verbose:
+        print('solving {} of {} problems exactly'.format(len(todo), len(keys)))
+    start = systime.time()
+    trial_results = run_trials([problems[t] for t in todo], [ExactSolver(max_nodes, time_limit)], workers=workers)
+    depth_scheds = np.full((len(todo),) + stages.shape[1:], -1)
+    missing = np.zeros(len(todo), dtype=bool)
+    optimal = np.zeros(len(todo), dtype=bool)
+    for j, (trial_scheds, trial_elapsed) in enumerate(trial_results):
+        depth_sched, optimal[j] = trial_scheds[0]
+        # BranchAndBound returns None when no schedule meets every deadline
+        if depth_sched is None:
+            missing[j] = True
+        else:
+            depth_scheds[j][:len(depth_sched)] = depth_sched
+    reasons, weightavgs, maxprios = batch_metrics(depth_scheds, stages[todo], time[todo], prec[todo], prio[todo], dead[todo], missing)
+    for j, t in enumerate(todo):
+        num_tasks = problems[t][0]
+        cache.put(keys[t], weightavgs[j], depth_scheds[j][:num_tasks], 'BranchAndBound', optimal[j], reasons[j])
+    cache.save()
+    if verbose:
+        print('solved in {:.1f}s, cached in {}'.format(systime.time() - start, cache.path))
+        unproven = np.count_nonzero(~optimal & (reasons == VALID))
+        if unproven:
+            print('{} schedules not proven optimal (the search was stopped by its limits)'.format(unproven))
+        unsolved = np.count_nonzero(reasons != VALID)
+        if unsolved:
+            print('{} problems not solved ({})'.format(unsolved, ', '.join(sorted({REASON_NAMES[r] for r in reasons if r != VALID}))))
+    return keys
+
+def score(algs, batch=None, cache=None, workers=1, verbose=True):
+    """
+    Runs the algorithms on every problem of batch (the default corpus by default) and scores them
+    against the cached optima, solving any problem that is not cached yet. The problems with no
+    optimum (cached as not solved, as no schedule meets every deadline) are left out of the scores.
+
+    Arguments:
+        algs        list of algorithm classes or instances (as passed to trials.run_trial)
+        batch       a batch of problems as returned by gen_corpus or problems.gen_problems
+        cache       the OptimaCache to score against (the one at OPTIMA_CACHE or DEFAULT_PATH by default)
+        workers     number of worker processes to run the trials in
+
+    Returns a list with, for each algorithm, a dictionary of
+        gaps        the optimality gap (optimum - metric) / optimum on each solved problem (1 if the schedule is invalid)
+        mean_gap    the mean of gaps
+        max_gap     the largest of gaps
+        optimal     the fraction of the problems solved optimally
+        invalid     the number of problems the algorithm returned an invalid schedule for
+        elapsed     the total seconds spent in sched
+    """
+    if batch is None:
+        batch = gen_corpus()
+    if cache is None:
+        cache = OptimaCache()
+    keys = solve(batch, cache, workers=workers, verbose=verbose)
+    solved = np.array([cache.get(key)['metric'] is not None for key in keys], dtype=bool)
+    optima = np.array([cache.get(key)['metric'] for key, s in zip(keys, solved) if s], dtype=np.float64)
+
+    stages, time, prec, prio, dead, mask = [a[solved] for a in batch]
+    problems = [get_problem(t, stages, time, prec, prio, dead) for t in range(len(stages))]
+    trial_results = run_trials(problems, algs, workers=workers)
+    depth_scheds = np.full((len(algs),) + stages.shape, -1)
+    missing = np.zeros((len(algs), len(problems)), dtype=bool)
+    elapsed = np.zeros(len(algs))
+    for t, (trial_scheds, trial_elapsed) in enumerate(trial_results):
+        elapsed += trial_elapsed
+        for i, depth_sched in enumerate(trial_scheds):
+            if depth_sched is None:
+                missing[i][t] = True
+            else:
+                depth_scheds[i][t][:len(depth_sched)] = depth_sched
+    reasons, weightavgs, maxprios = batch_metrics(depth_scheds, stages, time, prec, prio, dead, missing)
+
+    scores = []
+    for i in range(len(algs)):
+        valid = reasons[i] == VALID
+        # The optima are positive (every valid schedule runs the first stage of every task)
+        gaps = np.where(valid, (optima - weightavgs[i]) / np.where(optima > 0, optima, 1), 1)
+        scores.append({
+            'gaps': gaps,
+            'mean_gap': float(gaps.mean()) if len(gaps) else 0.0,
+            'max_gap': float(gaps.max()) if len(gaps) else 0.0,
+            'optimal': float(np.mean(gaps <= GAP_TOLERANCE)) if len(gaps) else 1.0,
+            'invalid': int(np.count_nonzero(~valid)),
+            'elapsed': float(elapsed[i]),
+        })
+    return scores
+
+def print_scores(alg_names, scores):
+    """
+    Prints the scores returned by score as a table.
+    """
+    width = max([len(name) for name in alg_names] + [3])
+    print('{} {:>10} {:>10} {:>10} {:>8} {:>10}'.format('alg'.ljust(width), 'mean gap', 'max gap', 'optimal', 'invalid', 'time (s)'))
+    for name, s in zip(alg_names, scores):
+        print('{} {:>10.5f} {:>10.5f} {:>10.3f} {:>8} {:>10.3f}'.format(
+            name.ljust(width), s['mean_gap'], s['max_gap'], s['optimal'], s['invalid'], s['elapsed']))
+
+
+if __name__ == '__main__':
+    # The algorithms by name, as benchmarked by latencybench.py
+    from latencybench import ALGS
+
+    parser = argparse.ArgumentParser(description='Score algorithms against the cached exact optima of a fixed corpus.')
+    parser.add_argument('--algs', nargs='+', choices=list(ALGS), help='algorithms to score (default all)')
+    parser.add_argument('--cache', help='optima cache file (default $OPTIMA_CACHE or {})'.format(DEFAULT_PATH))
+    parser.add_argument('--trials', type=int, default=CORPUS_TRIALS, help='problems per priority distribution')
+    parser.add_argument('--seed', type=int, default=CORPUS_SEED, help='seed the corpus is generated from')
+    parser.add_argument('--workers', type=int, default=1, help='worker processes to run the trials in')
+    parser.add_argument('--max-gap', type=float,
+                        help='exit non-zero if the mean gap of any algorithm is larger than this')
+    args = parser.parse_args()
+
+    alg_names = args.algs if args.algs else [name for name in ALGS if name not in ('BranchAndBound', 'Anytime')]
+    algs = [ALGS[name]['make'](.01, None) for name in alg_names]
+    scores = score(algs, gen_corpus(args.trials, args.seed), OptimaCache(args.cache), workers=args.workers)
+    print_scores(alg_names, scores)
+    if args.max_gap is not None and any(s['mean_gap'] > args.max_gap for s in scores):
+        sys.exit(1)
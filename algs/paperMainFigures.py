@@ -16,6 +16,7 @@ from greedyprime import GreedyPrime
 from greedylookahead import GreedyLookAhead
 from newgreedy import NewGreedy
 import random
+import os
 
 
 
@@ -24,6 +25,8 @@ rand.seed(3141592)
 
 # Run simulations
 num_trials = 10000
+# shard the trials across all of the cores (results do not depend on the number of workers)
+workers = os.cpu_count()
 prio_dist = 'uniform'
 #prio_dist = 'skew_right'
 #prio_dist = 'skew_left'
@@ -39,7 +42,7 @@ alg_names = ['Dynamic ('+str(deltas[0])+')',
             'Dynamic ('+str(deltas[1])+')', 
             'Dynamic ('+str(deltas[2])+')', 
             'Greedy'];
-num_tasks_list, results, avg_results, elapsed = diffsimulate(num_trials, algs, prio_dist=prio_dist, num_tasks=(2,30))
+num_tasks_list, results, avg_results, elapsed = diffsimulate(num_trials, algs, prio_dist=prio_dist, num_tasks=(2,30), workers=workers)
 print(elapsed)
 
 """
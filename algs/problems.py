@@ -0,0 +1,310 @@
+"""
+Functions for generating batches of 'random' scheduling problems, as used by the
+simulations, with all trials drawn at once as numpy arrays.
+
+Trials may have different numbers of tasks, so the arrays are padded to the largest
+number of tasks and come with a mask of the stages that actually exist.
+
+A single trial is unpadded into a Problem, which the algorithms share through their
+sched_problem entry point so that common setup is only done once per trial.
+"""
+
+import numpy as np
+from numpy import random as rand
+from functools import cached_property
+
+from kernels import pad_rows
+
+
+def gen_problems(num_tasks_list, prio_dist='uniform', num_stages=6, gen=None):
+    """
+    Generates one scheduling problem for each entry of num_tasks_list.
+
+    Arguments:
+        num_tasks_list  - num_tasks_list[t] is the number of tasks in trial t
+        prio_dist       - the distribution from which the priority for each task is drawn
+                            ('uniform', 'beta', 'skew_right', 'skew_left' or 'normal')
+        num_stages      - number of stages of every task
+        gen             - the numpy RandomState to draw from (numpy's global generator by default,
+                            so that seeding it fixes the whole simulation)
+
+    Returns stages, time, prec, prio, dead, mask where, for T trials and at most N tasks per trial,
+        stages  (T, N) int array, stages[t][i] is the number of stages for task i of trial t (0 for padding)
+        time    (T, N, L) array, time[t][i][l] is the runtime for the first l stages of task i (cumulative)
+        prec    (T, N, L) array, prec[t][i][l] is the expected prec for completing the first l stages of task i
+        prio    (T, N) array, prio[t][i] is the priority for task i
+        dead    (T, N) array, dead[t][i] is the deadline for task i
+        mask    (T, N, L) bool array, True for the stages that exist (False for padding)
+    """
+    if gen is None:
+        gen = rand
+    num_tasks_list = np.asarray(num_tasks_list)
+    T = len(num_tasks_list)
+    N = int(num_tasks_list.max()) if T > 0 else 0
+    L = num_stages
+
+    # Which tasks (and stages) of the padded arrays exist in each trial
+    task_mask = np.arange(N)[None, :] < num_tasks_list[:, None]
+    stages = np.where(task_mask, L, 0)
+    mask = np.broadcast_to(task_mask[:, :, None], (T, N, L)).copy()
+
+    # time[t][i][l] is the runtime for the first l stages of task i (cumulative)
+    # Sample times uniformly then sort
+    time = np.sort(gen.uniform(0, 1, size=(T, N, L)), axis=-1)
+    time[~mask] = 0
+
+    # prec[t][i][l] is the expected prec for completing the first l stages of task i before the deadline
+    # Sample precisions uniformly then sort
+    prec = np.sort(gen.uniform(size=(T, N, L)), axis=-1)
+    prec[~mask] = 0
+
+    # dead[t][i] is the deadline for task i 
+    # For now, let all the deadlines be half the total possible run time 
+    # to force some dropping of layers but some inclusion of others.
+    # We choose a deadline between the minimum necesary for valid scheduling (running the first stage
+    # of every task) and the maximum worst case run time (at most 1 per task)
+    total_mandatory_time = time[:, :, 0].sum(axis=1)
+    deadline_per_task = total_mandatory_time + .5 * (num_tasks_list - total_mandatory_time)
+    dead = np.where(task_mask, deadline_per_task[:, None], 0)
+
+    # the priority associated with each task drawn from passed distribution
+    if prio_dist == 'uniform':
+        prio = gen.uniform(size=(T, N))
+    elif prio_dist == 'beta':
+        # Sample from a beta distribution (high at 0 and 1, lower in between)
+        prio = gen.beta(.1, .1, size=(T, N))
+    elif prio_dist == 'skew_right':
+        prio = gen.beta(2, 8, size=(T, N))
+    elif prio_dist == 'skew_left':
+        prio = gen.beta(8, 2, size=(T, N))
+    elif prio_dist == 'normal':
+        # Normal, resampling whatever falls outside of [0,1]
+        mean = .5
+        stddev = .16
+        prio = gen.normal(mean, stddev, size=(T, N))
+        outside = (prio > 1) | (prio < 0)
+        while outside.any():
+            prio[outside] = gen.normal(mean, stddev, size=outside.sum())
+            outside = (prio > 1) | (prio < 0)
+    else:
+        raise ValueError("unknown prio_dist {}".format(prio_dist))
+    prio = np.where(task_mask, prio, 0)
+
+    return stages, time, prec, prio, dead, mask
+
+def get_problem(t, stages, time, prec, prio, dead):
+    """
+    Unpads trial t of a batch from gen_problems into the arguments sched takes.
+
+    Returns num_tasks, stages, time, prec, prio, dead for trial t.
+    """
+    num_tasks = int(np.count_nonzero(stages[t]))
+    trial_stages = [int(s) for s in stages[t][:num_tasks]]
+    trial_time = [time[t][i][:trial_stages[i]] for i in range(num_tasks)]
+    trial_prec = [prec[t][i][:trial_stages[i]] for i in range(num_tasks)]
+    trial_prio = prio[t][:num_tasks].tolist()
+    trial_dead = dead[t][:num_tasks].tolist()
+    return num_tasks, trial_stages, trial_time, trial_prec, trial_prio, trial_dead
+
+
+class Problem():
+    """
+    One scheduling problem, shared by all the algorithms that schedule it (see sched_problem
+    in the algorithm classes).
+
+    Every algorithm repeats the same setup on the raw inputs: the input checks, the priority
+    order, the time needed by the mandatory parts, heuristic tables, and so on. A Problem
+    computes each of these the first time an algorithm asks for it and keeps it for the rest.
+    Problems are immutable (the cached values would go stale otherwise): the attributes
+    cannot be reassigned, the per-task rows are stored as tuples or read-only arrays, and
+    the cached arrays are read-only too.
+    """
+
+    def __init__(self, num_tasks, stages, time, prec, prio, dead):
+        """
+        num_tasks   number of tasks
+        stages      stages[i] is number of stages for task i
+        time        time[i][l] is the expected runtime for the first l stages of task i (cumulative)
+        prec        prec[i][l] is the expected precision achieved by running the first l stages of task i
+        prio        prio[i] is the priority for task i
+        dead        dead[i] is the deadline for task i
+        """
+        set_attr = super().__setattr__
+        set_attr('num_tasks', num_tasks)
+        set_attr('stages', tuple(stages))
+        set_attr('time', tuple(_frozen(row) for row in time))
+        set_attr('prec', tuple(_frozen(row) for row in prec))
+        set_attr('prio', tuple(prio))
+        set_attr('dead', tuple(dead))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Problem is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Problem is immutable")
+
+    @property
+    def args(self):
+        """
+        The arguments sched takes for this problem: num_tasks, stages, time, prec, prio, dead.
+        """
+        return self.num_tasks, self.stages, self.time, self.prec, self.prio, self.dead
+
+    def check(self):
+        """
+        Raises ValueError if the inputs are malformed (the checks every sched starts with).
+        The checks only run until they first pass.
+        """
+        if '_checked' in self.__dict__:
+            return
+        num_tasks, stages, time, prec, prio, dead = self.args
+        if not isinstance(num_tasks, int) or num_tasks < 0:
+            raise ValueError("num_tasks should be a positive integer")
+        if not len(stages) == num_tasks:
+            raise ValueError("stages should have length num_tasks")
+        if not len(time) == num_tasks:
+            raise ValueError("time should have length num_tasks")
+        for task_idx, time_list in enumerate(time):
+            if not len(time_list) == stages[task_idx]:
+                raise ValueError("time[i] should have length stages[i]")
+        for task_idx, prec_list in enumerate(prec):
+            if not len(prec_list) == stages[task_idx]:
+                raise ValueError("prec[i] should have length stages[i]")
+        if not len(prec) == num_tasks:
+            raise ValueError("prec should have length num_tasks")
+        if not len(prio) == num_tasks:
+            raise ValueError("prio should have length num_tasks")
+        if not len(dead) == num_tasks:
+            raise ValueError("dead should have length num_tasks")
+        self.__dict__['_checked'] = True
+
+    @cached_property
+    def prio_array(self):
+        """
+        prio as a float64 array.
+        """
+        return _frozen(np.array(self.prio, dtype=np.float64))
+
+    @cached_property
+    def prio_order(self):
+        """
+        The tasks by decreasing priority (ties in the order given).
+        """
+        return _frozen(np.argsort(-1*self.prio_array))
+
+    @cached_property
+    def mand_time(self):
+        """
+        The time needed by the mandatory parts (first stages) of all tasks.
+        """
+        mand_time = 0
+        for i in range(self.num_tasks):
+            mand_time += self.time[i][0]
+        return mand_time
+
+    @cached_property
+    def mandatory_slack(self):
+        """
+        slack[j] is the slack of task j (see slacktree.py) when only the mandatory parts run.
+        """
+        slack = []
+        time_used = 0
+        for j in range(self.num_tasks):
+            time_used += self.time[j][0]
+            slack.append(self.dead[j] - time_used)
+        return tuple(slack)
+
+    def slack_tree(self):
+        """
+        Returns a new slacktree.SlackTree for the schedule running only the mandatory parts,
+        or None if that schedule already misses a deadline. (SlackTrees change as the
+        algorithms add stages, so each call returns a fresh one.)
+        """
+        from slacktree import SlackTree
+        slack = self.mandatory_slack
+        if self.num_tasks > 0 and min(slack) < 0:
+            return None
+        return SlackTree(slack)
+
+    @cached_property
+    def time_array(self):
+        """
+        time as a (num_tasks, max stages) float64 array, padded with zeros.
+        """
+        return _frozen(pad_rows(self.time, self.stages))
+
+    @cached_property
+    def prec_array(self):
+        """
+        prec as a (num_tasks, max stages) float64 array, padded with zeros.
+        """
+        return _frozen(pad_rows(self.prec, self.stages))
+
+    @cached_property
+    def stages_array(self):
+        """
+        stages as an int64 array.
+        """
+        return _frozen(np.array(self.stages, dtype=np.int64))
+
+    @cached_property
+    def marginal_time(self):
+        """
+        marginal_time[i][l] is the runtime of stage l of task i alone (time_array[i][l] - time_array[i][l-1],
+        and time_array[i][0] for the first stage).
+        """
+        return _frozen(np.diff(self.time_array, axis=1, prepend=0))
+
+    @cached_property
+    def marginal_prec(self):
+        """
+        marginal_prec[i][l] is the precision added by stage l of task i (as for marginal_time).
+        """
+        return _frozen(np.diff(self.prec_array, axis=1, prepend=0))
+
+    @cached_property
+    def heur_table(self):
+        """
+        heur_table[i][l] is prec[i][l] * prio[i] / time[i][l], the heuristic for running
+        task i to depth l (padded with nan).
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            table = self.prec_array * self.prio_array[:, None] / self.time_array
+        table[~self.stage_mask] = np.nan
+        return _frozen(table)
+
+    @cached_property
+    def marginal_heur_table(self):
+        """
+        marginal_heur_table[i][l] is marginal_prec[i][l] * prio[i] / marginal_time[i][l], the heuristic
+        for adding stage l of task i alone (padded with nan).
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            table = self.marginal_prec * self.prio_array[:, None] / self.marginal_time
+        table[~self.stage_mask] = np.nan
+        return _frozen(table)
+
+    @cached_property
+    def stage_mask(self):
+        """
+        stage_mask[i][l] is True for the stages that exist (False for padding).
+        """
+        L = self.time_array.shape[1]
+        return _frozen(np.arange(L)[None, :] < self.stages_array[:, None])
+
+    @cached_property
+    def hulls(self):
+        """
+        hulls[i] is the upper concave hull of the stages of task i (see hullgreedy.upper_hull).
+        """
+        from hullgreedy import upper_hull
+        return tuple(tuple(upper_hull(self.time[i], self.prec[i], self.prio[i])) for i in range(self.num_tasks))
+
+
+def _frozen(row):
+    # A read-only view of an array, or a tuple of any other sequence
+    if isinstance(row, np.ndarray):
+        row = row.view()
+        row.flags.writeable = False
+        return row
+    return tuple(row)
@@ -5,11 +5,16 @@ scheduling algorithms.
 An class with function sched of the form shown in this sample class
 is sufficient (as of 28 April 2022) for being used with this software 
 (in particular with the simulator) for comparison to other algorithms).
+Algorithms can also take a problems.Problem through sched_problem, as shown
+here, to share the setup (input checks, priority order, ...) of a problem with
+the other algorithms scheduling it; the simulator uses sched_problem when it exists.
 """
 
 import numpy as np
 import math
 
+from problems import Problem
+
 POS_INF = 10**10 
 
 class Algorithm():
@@ -32,27 +37,18 @@ class Algorithm():
         prio        prio[i] is the priority for task i
         dead        dead[i] is the deadline for task i
 
+        """
+        return self.sched_problem(Problem(num_tasks, stages, time, prec, prio, dead), verbose)
+
+    def sched_problem(self, problem, verbose=False):
+        """
+        Schedules the tasks of problem (a problems.Problem), as sched does.
+        New algorithms implement this, and take whatever they need from problem.
         """
 
         # Check for correct inputs
-        if not isinstance(num_tasks, int) or num_tasks < 0:
-            raise ValueError("num_tasks should be a positive integer")
-        if not len(stages) == num_tasks:
-            raise ValueError("stages should have length num_tasks")
-        if not len(time) == num_tasks:
-            raise ValueError("time should have length num_tasks")
-        for task_idx, time_list in enumerate(time):
-            if not len(time_list) == stages[task_idx]:
-                raise ValueError("time[i] should have length stages[i]")
-        for task_idx, prec_list in enumerate(prec):
-            if not len(prec_list) == stages[task_idx]:
-                raise ValueError("prec[i] should have length stages[i]")
-        if not len(prec) == num_tasks:
-            raise ValueError("prec should have length num_tasks")
-        if not len(prio) == num_tasks:
-            raise ValueError("prio should have length num_tasks")
-        if not len(dead) == num_tasks:
-            raise ValueError("dead should have length num_tasks")
+        problem.check()
+        num_tasks, stages, time, prec, prio, dead = problem.args
 
         # Return the depth schedule (EDF is used for the server to dispatch tasks)
         # For this sample algorith, we just return '0' which is the index of just the 
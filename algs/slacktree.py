@@ -0,0 +1,140 @@
+"""
+Feasibility index for greedy algorithms with per-task deadlines.
+
+Tasks run in the order given (earliest deadline first), so a schedule is valid when every
+task j finishes by its deadline: the total time of tasks 0..j is at most dead[j]. The slack of
+task j is dead[j] minus that total time. Running task i longer by t uses up t of the slack of
+task i and of every task after it, and is possible only if the smallest slack from task i
+onwards is at least t. Checking that by scanning the tasks is O(N) per stage added, so the
+slacks are kept in a segment tree with range add and range minimum, making both O(log N).
+
+When the slacks never increase from one task to the next (as when all tasks share a deadline)
+they keep doing so as time is added, the smallest slack from any task onwards is always that
+of the last task, and no tree is needed.
+"""
+
+POS_INF = 10**10
+
+
+class SlackTree():
+    """
+    Tracks how much more time each task and those before it can take (the slack of each task,
+    see above) as the stages of a schedule are added. problems.Problem.slack_tree builds a new one
+    from the mandatory parts of the tasks for each algorithm that calls it.
+    """
+
+    def __init__(self, slack):
+        """
+        slack       slack[j] is the slack of task j (its deadline minus the total time of tasks 0..j)
+        """
+        self.n = len(slack)
+        self.h = self.n.bit_length()
+        self.monotone = all(slack[j] >= slack[j+1] for j in range(self.n - 1))
+        # t[p] is the minimum slack over the tasks under node p (leaves are at n..2n-1), including
+        # the pending adds d[p] of node p itself but not those of its ancestors.
+        # t[1] is then the smallest slack of all, and the unused t[0] holds the slack of the last task
+        # (which is all that is kept in the monotone case).
+        if self.monotone:
+            self.t = [slack[-1] if self.n > 0 else POS_INF]
+            self.d = []
+        else:
+            self.t = [0] * self.n + list(slack)
+            self.d = [0] * self.n
+            for p in range(self.n - 1, 0, -1):
+                self.t[p] = min(self.t[2*p], self.t[2*p+1])
+            self.t[0] = slack[-1]
+
+    def copy(self):
+        """
+        Returns an independent copy of this tree (for searches that branch on the stages added).
+        """
+        other = SlackTree.__new__(SlackTree)
+        other.n, other.h, other.monotone = self.n, self.h, self.monotone
+        other.t = list(self.t)
+        other.d = list(self.d)
+        return other
+
+    def last_slack(self):
+        """
+        Returns the slack of the last task, the most time all the tasks together can still take on.
+        """
+        return self.t[0]
+
+    def add_time(self, i, t):
+        """
+        Records that task i runs for t more time, using up t of the slack of tasks i onwards.
+        """
+        self.t[0] -= t
+        if self.monotone:
+            return
+        l, r = i + self.n, 2 * self.n
+        l0, r0 = l, r
+        while l < r:
+            if l & 1:
+                self._apply(l, -t)
+                l += 1
+            if r & 1:
+                r -= 1
+                self._apply(r, -t)
+            l >>= 1
+            r >>= 1
+        self._build(l0)
+        self._build(r0 - 1)
+
+    def fits(self, i, t):
+        """
+        Returns whether task i can run for t more time with every task still meeting its deadline.
+        """
+        if self.monotone:
+            return t <= self.t[0]
+        # Most checks are settled by the smallest slack of all (a lower bound on the smallest slack
+        # from task i onwards) or the slack of the last task (an upper bound), without a query
+        if t <= self.t[1]:
+            return True
+        if t > self.t[0]:
+            return False
+        return t <= self.min_slack(i)
+
+    def min_slack(self, i=0):
+        """
+        Returns the smallest slack of tasks i onwards.
+        """
+        if i >= self.n:
+            return POS_INF
+        if self.monotone:
+            return self.t[0]
+        l, r = i + self.n, 2 * self.n
+        self._push(l)
+        self._push(r - 1)
+        res = POS_INF
+        while l < r:
+            if l & 1:
+                res = min(res, self.t[l])
+                l += 1
+            if r & 1:
+                r -= 1
+                res = min(res, self.t[r])
+            l >>= 1
+            r >>= 1
+        return res
+
+    def _apply(self, p, value):
+        self.t[p] += value
+        if p < self.n:
+            self.d[p] += value
+
+    def _build(self, p):
+        # Recomputes the ancestors of p from their children
+        while p > 1:
+            p >>= 1
+            self.t[p] = min(self.t[2*p], self.t[2*p+1]) + self.d[p]
+
+    def _push(self, p):
+        # Hands the pending adds of the ancestors of p down to their children
+        for s in range(self.h, 0, -1):
+            i = p >> s
+            if i > 0 and self.d[i] != 0:
+                self._apply(2*i, self.d[i])
+                self._apply(2*i+1, self.d[i])
+                self.d[i] = 0
+
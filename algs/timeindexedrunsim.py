@@ -0,0 +1,35 @@
+"""
+This script compares the reward-indexed and time-indexed formulations of the
+dynamic programming algorithm on the simulated scheduling problems.
+"""
+
+from diffsimulate import diffsimulate, plot_improvements, plot_times
+from numpy import random as rand
+from dynamic import Dynamic
+
+
+
+# Set the seed for the pseudonrandom number generator used for the simulations
+rand.seed(3141592)
+
+# Run simulations
+num_trials = 1000
+prio_dist = 'uniform'
+delta = .01
+time_steps = [100, 1000]
+algs = [Dynamic(delta), Dynamic(delta, index='time', time_steps=time_steps[0]), Dynamic(delta, index='time', time_steps=time_steps[1])]
+alg_names = ['Reward Indexed ('+str(delta)+')',
+            'Time Indexed ('+str(time_steps[0])+' steps)',
+            'Time Indexed ('+str(time_steps[1])+' steps)']
+num_tasks_list, results, avg_results, elapsed = diffsimulate(num_trials, algs, prio_dist=prio_dist, num_tasks=(2,30))
+print(elapsed)
+
+metric_name = '($C_{sum}$)'
+metric_idx = 0 # weighted sum of precs
+plot_improvements(num_tasks_list, avg_results, alg_names, metric_idx, metric_name)
+metric_name = '($C_{max}$)'
+metric_idx = 1 # max priority
+plot_improvements(num_tasks_list, avg_results, alg_names, metric_idx, metric_name)
+
+# Plot average time spent by each algorithm
+plot_times(num_tasks_list, elapsed, alg_names, num_trials)
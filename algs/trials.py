@@ -0,0 +1,85 @@
+"""
+Functions for running the individual trials (simulated scheduling problems) of a
+simulation, either one after another or sharded across a pool of worker processes.
+
+The problems are generated up front (see problems.py) and handed to the trials, so
+a trial produces the same results no matter which process runs it or how many
+workers there are.
+"""
+
+import numpy as np
+import multiprocessing
+import time as systime
+
+from problems import Problem
+
+
+def run_trial(problem, algs):
+    """
+    Solves one scheduling problem with each of the algorithms.
+
+    Arguments:
+        problem         - num_tasks, stages, time, prec, prio, dead for this trial (as returned by get_problem)
+        algs            - list of algorithm classes (instantiated fresh for this trial) or
+                            already instantiated algorithm objects
+
+    Returns depth_scheds, elapsed: the schedule returned by each algorithm (scored afterwards for
+    all trials at once, see metrics.batch_metrics) and the time each spent in sched.
+    """
+    # All the algorithms share one Problem, so setup common to them is only done once
+    # (and its time is counted for the first algorithm that needs it)
+    shared = Problem(*problem)
+
+    depth_scheds = []
+    elapsed = np.zeros(len(algs))
+    for i, alg in enumerate(algs):
+        if isinstance(alg, type):
+            alg = alg()
+
+        # Call sched for these inputs (for this scheduling problem, run the algorithm)
+        # (algorithms without sched_problem, eg written from an older template, get the raw inputs)
+        start = systime.time()
+        if hasattr(alg, 'sched_problem'):
+            depth_sched = alg.sched_problem(shared, verbose=False)
+        else:
+            depth_sched = alg.sched(*problem, verbose=False)
+        elapsed[i] += systime.time() - start
+        depth_scheds.append(depth_sched)
+    return depth_scheds, elapsed
+
+# The algorithms are sent to each worker process once, when it starts
+_worker_algs = None
+
+def _init_worker(algs):
+    global _worker_algs
+    _worker_algs = algs
+
+def _run_worker_trial(problem):
+    return run_trial(problem, _worker_algs)
+
+def run_trials(problems, algs, workers=1, progress=None):
+    """
+    Runs the passed trials, in order, and returns the list of run_trial results for each.
+
+    Arguments:
+        problems    - list of problems, one per trial (as returned by get_problem)
+        algs        - as passed to run_trial
+        workers     - number of worker processes to shard the trials across (1 runs them in this process)
+        progress    - optional wrapper for the iterator of results (eg tqdm) to report progress
+    """
+    if progress is None:
+        progress = lambda it, total: it
+    if workers <= 1:
+        results = (run_trial(problem, algs) for problem in problems)
+        return list(progress(results, len(problems)))
+    # Trials are handed out in chunks so that workers are not waiting on the parent for every trial
+    chunksize = max(1, len(problems) // (workers * 16))
+    # Forked workers inherit the already imported modules, so the simulation scripts (which run at import
+    # time, with no __main__ guard) are not re-run in every worker as they would be when spawning
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+    else:
+        context = multiprocessing.get_context()
+    with context.Pool(workers, initializer=_init_worker, initargs=(algs,)) as pool:
+        results = pool.imap(_run_worker_trial, problems, chunksize=chunksize)
+        return list(progress(results, len(problems)))
@@ -0,0 +1,5 @@
+import os
+
+# Run the device code in the tests on numba's CUDA simulator, so that they need no GPU
+# (numba reads this when it is first imported, which collecting the tests may already do)
+os.environ.setdefault("NUMBA_ENABLE_CUDASIM", "1")
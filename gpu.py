@@ -1,4 +1,7 @@
 import csv
+import os
+import threading
+from collections import OrderedDict
 import numpy
 # import time
 from numba import cuda
@@ -20,13 +23,97 @@ def sum_reduce(a, b):
 
 num = 0
 
+class WorkloadCache:
+    """LRU cache of parsed stage workloads, keyed by path and modification time
+
+    Parsing a stage CSV is much slower than running it, and the same few tasks are requested
+    over and over, so each file is parsed once and its array reused until the file changes.
+    The arrays are kept within a budget of max_bytes, evicting the least recently used.
+    loader(path) loads the array of a file (by default load_stage; GPU also keeps a cache
+    of device arrays, whose loader uploads the host array to the device)."""
+    def __init__(self, max_bytes=256 * 2**20, loader=None):
+        self.max_bytes = max_bytes
+        self.loader = loader if loader is not None else self.load_stage
+        self.entries = OrderedDict() # path -> (mtime, array), least recently used first
+        self.nbytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def load_stage(path):
+        """Load a stage file as a float64 array: a CSV is parsed, a .npy file memory-mapped"""
+        if path.endswith(".npy"):
+            # Zero-copy: pages are read from the file (and shared between processes) as they are used
+            return numpy.load(path, mmap_mode='r')
+        return numpy.genfromtxt(path, delimiter=',', dtype = numpy.float64)
+
+    def get(self, path):
+        """Return the (read-only) workload array of the stage file at path"""
+        mtime = os.stat(path).st_mtime_ns
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry[0] == mtime:
+                self.entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Parse outside of the lock so that hits on other files are not held up
+        arr = self.loader(path)
+        # The array is shared by every task that runs this stage
+        if isinstance(arr, numpy.ndarray):
+            arr.setflags(write=False)
+
+        with self.lock:
+            old = self.entries.pop(path, None)
+            if old is not None:
+                self.nbytes -= old[1].nbytes
+            # An array larger than the whole budget is used but not kept
+            if arr.nbytes <= self.max_bytes:
+                self.entries[path] = (mtime, arr)
+                self.nbytes += arr.nbytes
+                while self.nbytes > self.max_bytes:
+                    evicted_path, (evicted_mtime, evicted) = self.entries.popitem(last=False)
+                    self.nbytes -= evicted.nbytes
+                    self.evictions += 1
+        return arr
+
+    def clear(self):
+        """Drop all the cached arrays (the counters are kept)"""
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+    def get_counters(self):
+        """Hits, misses and evictions so far, and the number and bytes of the arrays cached"""
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'entries': len(self.entries), 'bytes': self.nbytes}
+
+
 class GPU:
+    def __init__(self, cache_bytes=256 * 2**20, vram_bytes=1024 * 2**20):
+        """cache_bytes is the budget of the host workload cache (0 disables caching), used when
+        the work runs on the CPU
+
+        vram_bytes is the budget of the device memory kept by the workloads uploaded to the GPU
+        (which are not kept on the host too).
+        Without a CUDA device (and outside of numba's simulator, NUMBA_ENABLE_CUDASIM=1) the
+        work runs on the CPU instead"""
+        self.workload_cache = WorkloadCache(cache_bytes)
+        self.stale_stages = set() # Stages warned about having an out of date .npy
+        self.use_device = cuda.is_available()
+        # Each workload is uploaded once and stays on the device until evicted
+        self.device_cache = WorkloadCache(vram_bytes, loader=self.upload) if self.use_device else None
+
     def run_task(self, task):
         ans = 0
         global num
         for i in range(task.level):
             # print("GPU running task at level", i)
-            workload_arr = self.workload_to_arr("tasks/" + str(task.name) + "/stage" + str(i))
+            workload_arr = self.load_workload("tasks/" + str(task.name) + "/stage" + str(i))
             ans += self.do_work(workload_arr)
         ans = ans / task.level
         num = num + 1
@@ -34,11 +121,45 @@ class GPU:
         print(num)
         # print("Final answer to task: ", ans)
 
+    def stage_path(self, stagedir):
+        """The file to load a stage from: its .npy if up to date, else its CSV"""
+        # Stages converted by tasks/convert_tasks.py are memory-mapped rather than parsed
+        npy_path = stagedir + ".npy"
+        try:
+            npy_mtime = os.path.getmtime(npy_path)
+        except OSError:
+            return stagedir
+        try:
+            csv_mtime = os.path.getmtime(stagedir)
+        except OSError:
+            # Converted with --remove-csv
+            return npy_path
+        if npy_mtime >= csv_mtime:
+            return npy_path
+        # The CSV was edited after it was converted, so the .npy is stale
+        if stagedir not in self.stale_stages:
+            self.stale_stages.add(stagedir)
+            print("warning:", npy_path, "is older than", stagedir, "- using the CSV (rerun tasks/convert_tasks.py)")
+        return stagedir
+
     def workload_to_arr(self, stagedir):
-        return numpy.genfromtxt(stagedir, delimiter=',', dtype = numpy.float64)
+        return self.workload_cache.get(self.stage_path(stagedir))
+
+    def load_workload(self, stagedir):
+        """The workload of a stage, on the device if there is one (else on the host)"""
+        if self.use_device:
+            return self.device_cache.get(self.stage_path(stagedir))
+        return self.workload_to_arr(stagedir)
 
+    def upload(self, path):
+        """Copy the workload of the stage file at path to the device"""
+        # Loaded around the host cache, so that workloads on the device are not also kept on the host
+        return cuda.to_device(WorkloadCache.load_stage(path))
 
     def do_work(self, workload):
+        if not self.use_device:
+            # CPU fallback
+            return float(numpy.sum(workload)) / workload.size
         work_sum = 0
         work_sum = work_sum + sum_reduce(workload)
-        return work_sum / len(workload)
+        return work_sum / workload.size
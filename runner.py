@@ -1,4 +1,5 @@
 import threading
+import time
 from gpu import GPU
 
 
@@ -6,16 +7,52 @@ class Runner:
     """Class and methods for how we actually run tasks and send to GPU"""
     def __init__(self):
         self.gpu = GPU()
+        self.stopped = threading.Event()
+        self.drain = False # Whether to finish the queued tasks before stopping
+        self.thread = None
+        # Counters, in seconds, of the time spent waiting for tasks and running them
+        self.idle_time = 0
+        self.busy_time = 0
+        self.tasks_run = 0
 
     def run_tasks(self, scheduler):
-        """forever run the tasks, call the scheduler API"""
+        """Run the tasks as the scheduler dispatches them, until stop_runner is called"""
         while True:
-            while scheduler.get_task_list_length() > 0:
-                curr_task = scheduler.get_next_task()
-                # Send task to GPU for execution
-                self.gpu.run_task(curr_task)
+            if self.stopped.is_set() and not (self.drain and scheduler.get_task_list_length() > 0):
+                break
+            # Block until a task is dispatched (waking now and then to check for stop_runner)
+            start = time.perf_counter()
+            curr_task = scheduler.get_next_task(block=True, timeout=.1)
+            self.idle_time += time.perf_counter() - start
+            if curr_task is None:
+                continue
+            # Send task to GPU for execution
+            start = time.perf_counter()
+            self.gpu.run_task(curr_task)
+            self.busy_time += time.perf_counter() - start
+            self.tasks_run += 1
 
     def start_runner(self, scheduler):
         """Create a new thread and run all the tasks"""
-        tid = threading.Thread(target=self.run_tasks, args=(scheduler,))
-        tid.start()
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.run_tasks, args=(scheduler,))
+        self.thread.start()
+
+    def stop_runner(self, drain=False, timeout=None):
+        """Stop the runner once the task it is running is done (and, if drain is True,
+        once the tasks already dispatched are done too)
+
+        Waits up to timeout seconds for it to stop (forever if None) and returns whether it did"""
+        self.drain = drain
+        self.stopped.set()
+        if self.thread is None:
+            return True
+        self.thread.join(timeout)
+        if self.thread.is_alive():
+            return False
+        self.thread = None
+        return True
+
+    def get_counters(self):
+        """Idle and busy time (seconds) and number of tasks run so far"""
+        return {'idle_time': self.idle_time, 'busy_time': self.busy_time, 'tasks_run': self.tasks_run}
@@ -1,30 +1,131 @@
-from apscheduler.schedulers.background import BackgroundScheduler
-class Scheduler:
+import heapq
+import itertools
+import queue
+import threading
+import time
+
+
+class TaskQueue:
+    """Thread-safe queue of tasks ordered by earliest deadline, then highest priority
+
+    Mirrors the queue.PriorityQueue API (put, get, get_nowait, qsize, empty), plus get_all, so the
+    server, scheduler and runner threads can share it. put and get are O(log N)."""
     def __init__(self):
-        self.task_q = [] # Que of tasks input by the server
-        self.run_arr = [] # tasks to be run by the server
+        self.heap = []
+        self.count = itertools.count() # Breaks ties in arrival order, so tasks are never compared
+        self.not_empty = threading.Condition(threading.Lock())
+
+    @staticmethod
+    def key(task):
+        """Heap key of a task: earliest deadline first, then highest priority"""
+        # (the server parses both into numbers when the request arrives)
+        return (task.deadline, -task.priority)
+
+    def put(self, task):
+        """Add a task to the queue"""
+        entry = self.key(task) + (next(self.count), task)
+        with self.not_empty:
+            heapq.heappush(self.heap, entry)
+            self.not_empty.notify()
+
+    def get(self, block=True, timeout=None):
+        """Remove and return the task with the earliest deadline
+
+        Waits for a task if block is True (up to timeout seconds if given), otherwise
+        or after the timeout raises queue.Empty if there is no task."""
+        with self.not_empty:
+            if not block:
+                if not self.heap:
+                    raise queue.Empty
+            elif not self.not_empty.wait_for(lambda: self.heap, timeout):
+                raise queue.Empty
+            return heapq.heappop(self.heap)[-1]
+
+    def get_all(self):
+        """Remove and return all the tasks in the queue, earliest deadline first"""
+        with self.not_empty:
+            entries, self.heap = self.heap, []
+        entries.sort()
+        return [entry[-1] for entry in entries]
+
+    def get_nowait(self):
+        """Remove and return the task with the earliest deadline, raising queue.Empty if there is none"""
+        return self.get(block=False)
+
+    def qsize(self):
+        """Number of tasks in the queue"""
+        with self.not_empty:
+            return len(self.heap)
+
+    def empty(self):
+        """Whether the queue has no tasks"""
+        return self.qsize() == 0
+
+    def __len__(self):
+        return self.qsize()
+
+
+class Scheduler:
+    def __init__(self, batch_window=.005):
+        """batch_window is how long (in seconds) arrivals are collected into one batch before scheduling"""
+        self.task_q = TaskQueue() # Que of tasks input by the server
+        self.run_arr = TaskQueue() # tasks to be run by the server
         self.task_reward_table = [] # Table of task/rewards
+        self.batch_window = batch_window
+        self.stopped = threading.Event()
+        self.thread = None
     def schedule_table(self):
         """Schedule the table based on the dynamic programming algo"""
         """Will also need to add tasks the the run_arr"""
-        if len(self.task_q) > 0:
-            self.run_arr.append(self.task_q.pop(-1))
+        self.schedule_batch(self.task_q.get_all())
+
+    def schedule_batch(self, batch):
+        """Schedule a batch of newly arrived tasks and add them to the run_arr"""
+        # Tasks go over earliest deadline first, as the algorithms assume EDF order
+        for task in batch:
+            self.run_arr.put(task)
 
         #TODO @obroadrick
-    def start_scheduler(self, time_seconds):
+    def run_scheduler(self):
+        """Schedule arrivals as they come in, until stop_scheduler is called"""
+        while not self.stopped.is_set():
+            # Sleep until a task arrives (waking now and then to check for stop_scheduler)
+            try:
+                first = self.task_q.get(timeout=.1)
+            except queue.Empty:
+                continue
+            # Give the tasks arriving with it (eg the other jobs of the same request) a moment
+            # to come in too, so that they are scheduled together
+            if self.batch_window > 0:
+                time.sleep(self.batch_window)
+            self.schedule_batch([first] + self.task_q.get_all())
+
+    def start_scheduler(self):
         """Server calls this to start the scheduler"""
-        sched = BackgroundScheduler(daemon=True)
-        sched.add_job(self.schedule_table,'interval', seconds = time_seconds)
-        sched.start()
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.run_scheduler, daemon=True)
+        self.thread.start()
+
+    def stop_scheduler(self):
+        """Stop the scheduler thread, once it is done with the batch it is scheduling"""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
 
     def add_task(self, task):
         """Sever will call this to add a task to the task_q which will later be scheduled"""
-        self.task_q.append(task)
+        self.task_q.put(task)
+
+    def get_next_task(self, block=False, timeout=None):
+        """Runner will call this to get the next task (earliest deadline first)
 
-    def get_next_task(self):
-        """Runner will call this to get the next task"""
-        return self.run_arr.pop(-1)
+        Returns None if there is no task (after waiting up to timeout seconds if block is True)"""
+        try:
+            return self.run_arr.get(block, timeout)
+        except queue.Empty:
+            return None
 
     def get_task_list_length(self):
         """Runner will call this to make sure the list is not empty"""
-        return len(self.run_arr)
+        return self.run_arr.qsize()
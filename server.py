@@ -1,3 +1,4 @@
+import math
 import os
 from scheduler import Scheduler
 from task import Task
@@ -11,7 +12,8 @@ scheduler = Scheduler()
 runner = Runner()
 
 def create_new_task(job, deadline, priority):
-    stage_files_list = os.listdir("tasks/" + "task" + job)
+    # A stage may be a CSV, its converted .npy or both (see tasks/convert_tasks.py)
+    stage_files_list = list(set(os.path.splitext(stage_file)[0] for stage_file in os.listdir("tasks/" + "task" + job)))
     stage_files_list.sort()
     stage_list = []
     for stage_file in stage_files_list:
@@ -21,16 +23,34 @@ def create_new_task(job, deadline, priority):
     task = Task(stage_list, priority, deadline, "task"+job)
     return task
 
+def parse_number(value):
+    """Parse a deadline or priority from the URL, returning None if it is not a finite number"""
+    try:
+        number = float(value)
+    except ValueError:
+        return None
+    return number if math.isfinite(number) else None
+
 @app.route("/<job_arr>&<deadline>&<priority>")
 def home(job_arr, deadline, priority):
+    # The task queues order tasks by these, so bad values are turned away here
+    deadline_value = parse_number(deadline)
+    priority_value = parse_number(priority)
+    if deadline_value is None or priority_value is None:
+        return "deadline and priority should be numbers", 400
     jobs = job_arr.split(",")
     for job in jobs:
-        task = create_new_task(job, deadline, priority)
+        task = create_new_task(job, deadline_value, priority_value)
         scheduler.add_task(task)
     return "Adding job" + str(jobs) + "deadline" + str(deadline)
 
 
 if __name__ == "__main__":
-    scheduler.start_scheduler(1)
+    scheduler.start_scheduler()
     runner.start_runner(scheduler)
-    app.run()
+    try:
+        app.run()
+    finally:
+        # Let the runner finish the task it is on, so the process can exit
+        scheduler.stop_scheduler()
+        runner.stop_runner()
@@ -0,0 +1,41 @@
+import os
+import sys
+import numpy
+
+# Converts the stage CSVs written by gen_task.py into binary .npy files next to them
+# (tasks/task0/stage0 -> tasks/task0/stage0.npy), which GPU memory-maps instead of parsing.
+# Usage: python convert_tasks.py [--remove-csv] [task_dir ...]   (default: every task* dir here)
+
+def convert_stage(csv_path, remove_csv=False):
+    """Write csv_path as csv_path.npy, unless that is already up to date. Returns whether it was written"""
+    npy_path = csv_path + ".npy"
+    converted = False
+    if not (os.path.exists(npy_path) and os.path.getmtime(npy_path) >= os.path.getmtime(csv_path)):
+        arr = numpy.genfromtxt(csv_path, delimiter=',', dtype=numpy.float64)
+        # Written to a temporary file first so GPU never maps a half written file
+        tmp_path = npy_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            numpy.save(f, arr)
+        os.replace(tmp_path, npy_path)
+        converted = True
+    if remove_csv:
+        os.remove(csv_path)
+    return converted
+
+def convert_task_dir(task_dir, remove_csv=False):
+    """Convert every stage CSV in task_dir. Returns the number of stages converted"""
+    converted = 0
+    for stage_file in sorted(os.listdir(task_dir)):
+        if stage_file.startswith("stage") and "." not in stage_file:
+            converted += convert_stage(os.path.join(task_dir, stage_file), remove_csv)
+    return converted
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    remove_csv = "--remove-csv" in args
+    task_dirs = [arg for arg in args if arg != "--remove-csv"]
+    if not task_dirs:
+        task_dirs = sorted(d for d in os.listdir(".") if d.startswith("task") and os.path.isdir(d))
+    for task_dir in task_dirs:
+        print(task_dir, convert_task_dir(task_dir, remove_csv), "stages converted")
@@ -0,0 +1,55 @@
+import os
+import numpy
+from gpu import GPU
+
+
+def write_stages(stage_dir, num_stages, size):
+    """Write num_stages stage CSVs of size values each, returning their paths and arrays"""
+    rng = numpy.random.RandomState(0)
+    stages = []
+    for i in range(num_stages):
+        path = os.path.join(str(stage_dir), "stage" + str(i))
+        arr = rng.random_sample(size)
+        numpy.savetxt(path, arr[None], delimiter=',')
+        stages.append((path, arr))
+    return stages
+
+
+def test_device_cache_hits_and_evictions(tmp_path):
+    stages = write_stages(tmp_path, 3, 100)
+    # Room on the device for two of the three workloads
+    # (the device is numba's CUDA simulator, see conftest.py)
+    gpu = GPU(vram_bytes=2 * 100 * 8)
+    assert gpu.use_device
+
+    for path, arr in stages[:2]:
+        gpu.load_workload(path)
+    for path, arr in stages[:2]:
+        gpu.load_workload(path)
+    counters = gpu.device_cache.get_counters()
+    assert (counters['hits'], counters['misses'], counters['evictions']) == (2, 2, 0)
+
+    # The third workload evicts the least recently used one (stage0)
+    gpu.load_workload(stages[2][0])
+    gpu.load_workload(stages[0][0])
+    counters = gpu.device_cache.get_counters()
+    assert (counters['hits'], counters['misses'], counters['evictions']) == (2, 4, 2)
+    assert counters['entries'] == 2 and counters['bytes'] == 2 * 100 * 8
+
+    # Uploaded workloads are kept on the device only
+    assert gpu.workload_cache.get_counters()['entries'] == 0
+    for path, arr in stages:
+        assert numpy.isclose(gpu.do_work(gpu.load_workload(path)), numpy.mean(arr))
+
+
+def test_cpu_fallback_matches_mean(tmp_path):
+    stages = write_stages(tmp_path, 2, 1000)
+    gpu = GPU()
+    # As without a CUDA device
+    gpu.use_device = False
+
+    for path, arr in stages:
+        workload = gpu.load_workload(path)
+        assert isinstance(workload, numpy.ndarray)
+        assert numpy.isclose(gpu.do_work(workload), numpy.mean(arr))
+    assert gpu.workload_cache.get_counters()['misses'] == 2